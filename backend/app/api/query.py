@@ -1,64 +1,241 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+import json
+import logging
+from typing import Annotated
 
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.core.log import log_event
+from app.core.metrics import stage
+from app.core.settings import get_settings
+from app.services.batch_engine import intent_key, run_batch
+from app.services.intent_cache import normalize_question
 from app.services.intent_validator import validate_intent
-from app.services.query_engine import run_query
-from app.services.why_engine import analyze_change
+from app.services.query_engine import fetch_data, fetch_plan
+from app.services.speculation import resolve_with_prefetch
+from app.services.table_pages import (
+    InvalidColumns,
+    InvalidCursor,
+    check_columns,
+    fetch_table_page,
+    page_source,
+    stream_table,
+)
+from app.services.why_engine import analyze_change, driver_reasons
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api")
 
 
+ColumnName = Annotated[str, Field(pattern=r"^[A-Za-z_][A-Za-z0-9_]*$")]
+
+
 class QueryRequest(BaseModel):
     question: str
+    include_table: bool = True
+    # Table shaping: projected columns and keyset pagination
+    columns: list[ColumnName] | None = None
+    page_size: int = Field(50, ge=1, le=1000)
+    cursor: str | None = None
 
 
-@router.post("/query")
-def handle_query(payload: QueryRequest):
+class BatchQueryRequest(BaseModel):
+    questions: list[str] = Field(min_length=1, max_length=50)
+    include_table: bool = True
+    columns: list[ColumnName] | None = None
+    page_size: int = Field(50, ge=1, le=1000)
+
+
+class ExportRequest(BaseModel):
+    question: str
+    columns: list[ColumnName] | None = None
+
+
+CLARIFICATION_RESPONSE = {
+    "answer": "Could you please clarify your question?",
+    "why": [],
+    "table": [],
+    "explainability": {},
+}
+
+
+def wants_page(intent: dict, include_table: bool) -> bool:
     """
-    Handle user queries by extracting intent and fetching real data.
+    Whether the table is a page of detail rows (breakdowns show groups instead).
+    """
+    return include_table and intent.get("breakdown") not in ("product", "category")
+
+
+def build_response(intent: dict, result: dict) -> dict:
+    """
+    Turn an intent and its fetched data into the API response.
     """
 
     # ✅ ALWAYS define this first
     previous_value = None
     why_data = {}
+    why_items = []
 
-    # Step 1: Extract and validate intent
-    intent = validate_intent(payload.question)
-    print("INTENT:", intent)
+    _, _, breakdown, wants_why = fetch_plan(intent)
+    wants_breakdown = breakdown in ("product", "category")
 
-    # Step 2: Handle unclear intent safely
-    if isinstance(intent, dict) and intent.get("clarification_required") is True:
-        return {
-            "answer": "Could you please clarify your question?",
-            "why": [],
-            "table": [],
-            "explainability": {},
-        }
-
-    # Step 3: Run real query against Supabase
-    result = run_query(intent)
+    if wants_why:
+        previous_value = result.get("previous_value", 0)
     value = result.get("value", 0)
     rows = result.get("rows", [])
+    groups = result.get("breakdown", [])
 
     metric = intent.get("metric")
     time_range = intent.get("time_range", "").replace("_", " ")
 
-    # Step 4: Generate human-readable answer
+    # Generate human-readable answer
     answer_text = f"Your {metric} for {time_range} is {value}."
+    if groups:
+        answer_text += f" Top {breakdown}: {groups[0][breakdown]} ({groups[0]['value']})."
 
-    # Step 5: WHY mode (SAFE)
-    comparison = intent.get("comparison")
-    why_flag = intent.get("why_analysis")
-
-    if comparison == "previous_period" or why_flag is True:
-        # demo baseline (replace later with real previous query)
-        previous_value = value * 1.2
-        why_data = analyze_change(value, previous_value, metric)
+    # WHY mode (SAFE): overall change first, then its largest drivers
+    if wants_why:
+        with stage("why"):
+            why_data = analyze_change(value, previous_value, metric)
+            drivers = result.get("drivers") or {}
+            why_items = [why_data, *driver_reasons(drivers, metric)]
+            if drivers:
+                why_data = {**why_data, "drivers": drivers}
 
-    # Step 6: Return API response
     return {
         "answer": answer_text,
-        "why": [why_data] if why_data else [],
-        "table": rows,
+        "why": why_items,
+        "table": groups if wants_breakdown else rows,
         "explainability": why_data,
     }
+
+
+@router.post("/query")
+async def handle_query(payload: QueryRequest):
+    """
+    Handle user queries by extracting intent and fetching real data.
+    """
+
+    # Step 1: Extract and validate intent (aggregate fetch may start speculatively)
+    intent, prefetch = await resolve_with_prefetch(
+        payload.question,
+        plan=fetch_plan,
+        fetch=fetch_data,
+    )
+    log_event(logger, "intent", intent=intent, speculative=prefetch is not None)
+
+    # Step 2: Handle unclear intent safely
+    if isinstance(intent, dict) and intent.get("clarification_required") is True:
+        return {**CLARIFICATION_RESPONSE, "next_cursor": None}
+
+    # Step 3: Aggregate (or the speculative fetch) and one page of rows, concurrently
+    answer_data = prefetch if prefetch is not None else fetch_data(intent)
+    page = {"rows": [], "next_cursor": None}
+    try:
+        if wants_page(intent, payload.include_table):
+            result, page = await asyncio.gather(
+                answer_data,
+                fetch_table_page(intent, payload.columns, payload.page_size, payload.cursor),
+            )
+        else:
+            result = await answer_data
+    except (InvalidColumns, InvalidCursor) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    # Step 4: Answer, WHY analysis and table
+    response = build_response(intent, {**result, "rows": page["rows"]})
+    response["next_cursor"] = page["next_cursor"]
+    return response
+
+
+@router.post("/query/batch")
+async def handle_batch(payload: BatchQueryRequest):
+    """
+    Answer several questions at once (e.g. dashboard tiles).
+
+    Intents are extracted concurrently, duplicates collapse to one, and data
+    is fetched once per (table, date window) for every metric that needs it.
+    Tiles whose table lacks a requested column get an empty table and a
+    "table_error" instead of failing the batch.
+    """
+    # Questions that normalize the same share one intent extraction
+    first_by_key = {}
+    for question in payload.questions:
+        first_by_key.setdefault(normalize_question(question), question)
+    extracted = await asyncio.gather(*(validate_intent(q) for q in first_by_key.values()))
+    intent_by_key = dict(zip(first_by_key, extracted))
+
+    intents = [
+        intent for intent in extracted
+        if not (isinstance(intent, dict) and intent.get("clarification_required") is True)
+    ]
+    results = await run_batch(intents)
+
+    # First page of rows per distinct (table, window); tiles page further via /query
+    page_keys = {}
+    for intent in intents:
+        if wants_page(intent, payload.include_table):
+            page_keys.setdefault(page_source(intent), intent)
+
+    async def first_page(intent: dict) -> dict:
+        # Columns can be valid on one tile's table and not another's
+        try:
+            return await fetch_table_page(intent, payload.columns, payload.page_size)
+        except InvalidColumns as exc:
+            return {"rows": [], "next_cursor": None, "table_error": str(exc)}
+
+    pages = await asyncio.gather(*(first_page(intent) for intent in page_keys.values()))
+    page_for = dict(zip(page_keys, pages))
+
+    answers = []
+    for question in payload.questions:
+        intent = intent_by_key[normalize_question(question)]
+        if intent.get("clarification_required") is True:
+            answers.append({"question": question, **CLARIFICATION_RESPONSE})
+            continue
+        result = results[intent_key(intent)]
+        page = {"rows": [], "next_cursor": None}
+        if wants_page(intent, payload.include_table):
+            page = page_for[page_source(intent)]
+        response = build_response(intent, {**result, "rows": page["rows"]})
+        answer = {"question": question, **response, "next_cursor": page["next_cursor"]}
+        if "table_error" in page:
+            answer["table_error"] = page["table_error"]
+        answers.append(answer)
+
+    return {"results": answers}
+
+
+@router.post("/query/export")
+async def export_query(payload: ExportRequest):
+    """
+    Stream the answer and every detail row as NDJSON.
+
+    The first line is the answer ({"answer", "why", "explainability"}); each
+    following line is one row. Rows are read page by page, so memory stays
+    bounded however large the window is.
+    """
+    intent = await validate_intent(payload.question)
+    if intent.get("clarification_required") is True:
+        summary = {key: CLARIFICATION_RESPONSE[key] for key in ("answer", "why", "explainability")}
+        return StreamingResponse(iter([json.dumps(summary) + "\n"]), media_type="application/x-ndjson")
+
+    # Validate before streaming starts; errors can't change the status later
+    try:
+        check_columns(intent, payload.columns)
+    except InvalidColumns as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    result = await fetch_data(intent)
+    response = build_response(intent, result)
+    summary = {key: response[key] for key in ("answer", "why", "explainability")}
+
+    async def lines():
+        yield json.dumps(summary) + "\n"
+        async for row in stream_table(intent, payload.columns, get_settings().table_page_max):
+            yield json.dumps(row, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
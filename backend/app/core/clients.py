@@ -0,0 +1,68 @@
+import httpx
+from groq import AsyncGroq
+
+from .settings import Settings, get_settings
+
+
+_http_client: httpx.AsyncClient | None = None
+_groq_client: AsyncGroq | None = None
+
+
+async def init_clients(settings: Settings | None = None) -> None:
+    """
+    Create the shared HTTP and Groq clients. Called from the FastAPI lifespan.
+    """
+    global _http_client, _groq_client
+    settings = settings or get_settings()
+
+    _http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    )
+
+    # Groq is optional at startup; get_groq_client raises if it's missing
+    if settings.groq_api_key:
+        _groq_client = AsyncGroq(
+            api_key=settings.groq_api_key,
+            base_url=settings.groq_base_url or None,
+            timeout=settings.groq_timeout,
+            max_retries=settings.groq_max_retries,
+        )
+
+
+async def close_clients() -> None:
+    """
+    Close the shared clients on shutdown.
+    """
+    global _http_client, _groq_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _groq_client is not None:
+        await _groq_client.close()
+        _groq_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled AsyncClient used for Supabase calls.
+    """
+    if _http_client is None:
+        raise RuntimeError("HTTP client not initialised; is the app lifespan running?")
+    return _http_client
+
+
+def get_groq_client() -> AsyncGroq:
+    """
+    Return the shared AsyncGroq client.
+
+    Raises:
+        ValueError: If GROQ_API_KEY environment variable is not set
+    """
+    if _groq_client is None:
+        raise ValueError("GROQ_API_KEY environment variable is not set")
+    return _groq_client
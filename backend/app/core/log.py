@@ -0,0 +1,44 @@
+import json
+import logging
+import random
+
+from .settings import get_settings
+
+
+_handler: logging.Handler | None = None
+
+
+def configure_logging(level: str, stream=None) -> logging.Logger:
+    """
+    Send the "app" loggers to stderr (or `stream`) at `level`.
+
+    Nothing else configures logging, so without this the app.* loggers
+    inherit the root WARNING level and sampled INFO events are dropped.
+    Calling it again replaces the handler instead of adding another.
+    """
+    global _handler
+    logger = logging.getLogger("app")
+    if _handler is not None:
+        logger.removeHandler(_handler)
+
+    _handler = logging.StreamHandler(stream)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(level)
+    # Keep lines from doubling up if the server also configures the root logger
+    logger.propagate = False
+    return logger
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields) -> None:
+    """
+    Emit a structured (JSON) log line.
+
+    INFO and below are sampled at LOG_SAMPLE_RATE so the hot path stays
+    cheap; warnings and errors are always logged.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if level < logging.WARNING and random.random() >= get_settings().log_sample_rate:
+        return
+    logger.log(level, json.dumps({"event": event, **fields}, default=str))
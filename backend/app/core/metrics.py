@@ -0,0 +1,169 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+
+# Latency buckets in seconds, tuned for sub-second API stages
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_str(labels: tuple) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels.
+    """
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_str(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with optional labels.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        # [bucket counts..., +Inf count, sum]
+        series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_label_str(key + (('le', bound),))} {series[i]}")
+            count = series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_label_str(key + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_label_str(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_label_str(key)} {count}")
+        return lines
+
+
+_metrics: list = []
+_collectors: list[tuple[str, str, str, Callable[[], dict], tuple[str, ...]]] = []
+
+
+def counter(name: str, help_text: str) -> Counter:
+    metric = Counter(name, help_text)
+    _metrics.append(metric)
+    return metric
+
+
+def histogram(name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    metric = Histogram(name, help_text, buckets)
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(
+    name: str, help_text: str, label: str, collect: Callable[[], dict], gauges: tuple[str, ...] = ()
+) -> None:
+    """
+    Expose an existing stats() dict as a labelled counter family at scrape time.
+
+    Keys listed in `gauges` (e.g. a current size) go up and down, so each is
+    exposed as its own `<name>_<key>` gauge instead.
+    """
+    _collectors.append((name, help_text, label, collect, gauges))
+
+
+def render_metrics() -> str:
+    """
+    Prometheus text exposition of every registered metric.
+    """
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for name, help_text, label, collect, gauges in _collectors:
+        stats = collect()
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in sorted(stats.items()):
+            if key not in gauges:
+                lines.append(f'{name}{{{label}="{key}"}} {value}')
+        for key in gauges:
+            lines.append(f"# HELP {name}_{key} {help_text}")
+            lines.append(f"# TYPE {name}_{key} gauge")
+            lines.append(f"{name}_{key} {stats[key]}")
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = histogram("vyapar_stage_seconds", "Time spent per request stage.")
+REQUEST_SECONDS = histogram("vyapar_request_seconds", "End-to-end request latency.")
+SUPABASE_BYTES = counter("vyapar_supabase_bytes_total", "Response bytes received from Supabase.")
+SUPABASE_CALLS = counter("vyapar_supabase_requests_total", "Requests sent to Supabase.")
+
+# Per-request list of (stage, milliseconds, description) for Server-Timing
+_timings: ContextVar[list | None] = ContextVar("vyapar_timings", default=None)
+
+
+def start_request_timings() -> list:
+    """
+    Begin collecting stage timings for the current request.
+    """
+    timings: list = []
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name: str, desc: str = ""):
+    """
+    Time a block as a named stage: observed in the stage histogram and,
+    inside a request, reported in its Server-Timing header.
+
+    Yields a dict; setting "desc" on it annotates the Server-Timing entry.
+    """
+    info = {"desc": desc}
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed * 1000, info["desc"]))
+
+
+def server_timing_header(timings: list) -> str:
+    """
+    Format collected timings as a Server-Timing header value.
+    """
+    entries = []
+    for name, ms, desc in timings:
+        entry = f"{name};dur={ms:.1f}"
+        if desc:
+            entry += f';desc="{desc}"'
+        entries.append(entry)
+    return ", ".join(entries)
@@ -0,0 +1,154 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name, "").strip()
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name, "").strip().lower()
+    return value not in ("0", "false", "no", "off") if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Runtime configuration, parsed once from the environment at startup.
+    """
+
+    supabase_url: str
+    supabase_anon_key: str
+    groq_api_key: str
+    groq_model: str = "llama3-8b-8192"
+    # Empty means the SDK default (api.groq.com); set for local stand-ins
+    groq_base_url: str = ""
+
+    # HTTP pool shared by Supabase calls
+    http_timeout: float = 10.0
+    http_connect_timeout: float = 5.0
+    http_max_connections: int = 100
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 30.0
+
+    # Groq client
+    groq_timeout: float = 15.0
+    groq_max_retries: int = 0
+
+    # Intent extraction latency bounds: a total budget across attempts, a
+    # per-attempt timeout and a small completion. Hedging fires a second
+    # attempt once the first has run for the observed p95 (llm_hedge_delay
+    # until enough samples exist).
+    llm_budget: float = 3.0
+    llm_attempt_timeout: float = 1.5
+    llm_max_attempts: int = 2
+    llm_max_tokens: int = 96
+    llm_hedging: bool = False
+    llm_hedge_delay: float = 0.8
+
+    # Intent cache (size 0 disables it; empty path keeps it in memory only)
+    intent_cache_size: int = 1024
+    intent_cache_ttl: float = 6 * 3600.0
+    intent_cache_path: str = ""
+
+    # Rule-based parser answers without the LLM at or above this confidence
+    fast_path_enabled: bool = True
+    fast_path_confidence: float = 0.85
+
+    # Local rollup store (empty path disables it)
+    rollup_path: str = ""
+    rollup_sync_interval: float = 60.0
+    rollup_max_staleness: float = 300.0
+    rollup_page_size: int = 1000
+
+    # Groups shown before folding the rest into "others"
+    breakdown_top_n: int = 10
+
+    # "Why" answers attribute the change to products/categories
+    drivers_enabled: bool = True
+    drivers_top_n: int = 5
+
+    # Start the guessed data fetch while the LLM is still extracting intent
+    speculation_enabled: bool = True
+
+    # Short-TTL run_query result cache (size 0 keeps only single-flight)
+    result_cache_size: int = 256
+    result_cache_max_rows: int = 1000
+    result_ttl_today: float = 30.0
+    result_ttl_last_7_days: float = 120.0
+    result_ttl_last_month: float = 900.0
+
+    # After PostgREST rejects an aggregate select on a table, skip straight
+    # to projected fetches there for this long before probing again
+    aggregate_retry_interval: float = 300.0
+
+    # Largest page of detail rows a single response may carry
+    table_page_max: int = 1000
+
+    # Level of the "app" loggers, and the share of INFO-level structured
+    # log lines that are emitted
+    log_level: str = "INFO"
+    log_sample_rate: float = 0.01
+
+
+def load_settings() -> Settings:
+    """
+    Build Settings from environment variables.
+    """
+    return Settings(
+        supabase_url=os.getenv("SUPABASE_URL", "").strip().rstrip("/"),
+        supabase_anon_key=os.getenv("SUPABASE_ANON_KEY", "").strip(),
+        groq_api_key=os.getenv("GROQ_API_KEY", "").strip(),
+        groq_model=os.getenv("GROQ_MODEL", "llama3-8b-8192").strip(),
+        groq_base_url=os.getenv("GROQ_BASE_URL", "").strip(),
+        http_timeout=_env_float("HTTP_TIMEOUT", 10.0),
+        http_connect_timeout=_env_float("HTTP_CONNECT_TIMEOUT", 5.0),
+        http_max_connections=_env_int("HTTP_MAX_CONNECTIONS", 100),
+        http_max_keepalive=_env_int("HTTP_MAX_KEEPALIVE", 20),
+        http_keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+        groq_timeout=_env_float("GROQ_TIMEOUT", 15.0),
+        groq_max_retries=_env_int("GROQ_MAX_RETRIES", 0),
+        llm_budget=_env_float("LLM_BUDGET", 3.0),
+        llm_attempt_timeout=_env_float("LLM_ATTEMPT_TIMEOUT", 1.5),
+        llm_max_attempts=_env_int("LLM_MAX_ATTEMPTS", 2),
+        llm_max_tokens=_env_int("LLM_MAX_TOKENS", 96),
+        llm_hedging=_env_bool("LLM_HEDGING", False),
+        llm_hedge_delay=_env_float("LLM_HEDGE_DELAY", 0.8),
+        intent_cache_size=_env_int("INTENT_CACHE_SIZE", 1024),
+        intent_cache_ttl=_env_float("INTENT_CACHE_TTL", 6 * 3600.0),
+        intent_cache_path=os.getenv("INTENT_CACHE_PATH", "").strip(),
+        fast_path_enabled=_env_bool("FAST_PATH_ENABLED", True),
+        fast_path_confidence=_env_float("FAST_PATH_CONFIDENCE", 0.85),
+        rollup_path=os.getenv("ROLLUP_PATH", "").strip(),
+        rollup_sync_interval=_env_float("ROLLUP_SYNC_INTERVAL", 60.0),
+        rollup_max_staleness=_env_float("ROLLUP_MAX_STALENESS", 300.0),
+        rollup_page_size=_env_int("ROLLUP_PAGE_SIZE", 1000),
+        breakdown_top_n=_env_int("BREAKDOWN_TOP_N", 10),
+        drivers_enabled=_env_bool("DRIVERS_ENABLED", True),
+        drivers_top_n=_env_int("DRIVERS_TOP_N", 5),
+        speculation_enabled=_env_bool("SPECULATION_ENABLED", True),
+        result_cache_size=_env_int("RESULT_CACHE_SIZE", 256),
+        result_cache_max_rows=_env_int("RESULT_CACHE_MAX_ROWS", 1000),
+        result_ttl_today=_env_float("RESULT_TTL_TODAY", 30.0),
+        result_ttl_last_7_days=_env_float("RESULT_TTL_LAST_7_DAYS", 120.0),
+        result_ttl_last_month=_env_float("RESULT_TTL_LAST_MONTH", 900.0),
+        aggregate_retry_interval=_env_float("AGGREGATE_RETRY_INTERVAL", 300.0),
+        table_page_max=_env_int("TABLE_PAGE_MAX", 1000),
+        log_level=os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO",
+        log_sample_rate=_env_float("LOG_SAMPLE_RATE", 0.01),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide Settings (parsed on first use).
+    """
+    return load_settings()
@@ -1,10 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.query import router as query_router
+from app.core.clients import close_clients, init_clients
+from app.core.log import configure_logging
+from app.core.metrics import (
+	REQUEST_SECONDS,
+	register_collector,
+	render_metrics,
+	server_timing_header,
+	start_request_timings,
+)
+from app.core.settings import get_settings
+from app.services.intent_cache import get_intent_cache
+from app.services.intent_validator import llm_stats, resolution_stats
+from app.services.result_cache import get_result_cache
+from app.services.rollup_store import sync_forever
+from app.services.speculation import speculation_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	"""Parse settings and open pooled clients once per process."""
+	settings = get_settings()
+	configure_logging(settings.log_level)
+	await init_clients(settings)
+	# Build the intent cache (and read its SQLite file) off the event loop
+	intent_cache = await asyncio.to_thread(get_intent_cache)
 
+	# Keep the local rollups trickle-synced in the background
+	sync_task = asyncio.create_task(sync_forever()) if settings.rollup_path else None
+	try:
+		yield
+	finally:
+		if sync_task is not None:
+			sync_task.cancel()
+			with suppress(asyncio.CancelledError):
+				await sync_task
+		await intent_cache.flush()
+		await close_clients()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
 	CORSMiddleware,
@@ -16,8 +58,44 @@ app.add_middleware(
 
 app.include_router(query_router)
 
+register_collector(
+	"vyapar_intent_cache", "Intent cache hits, misses and size.", "kind", lambda: get_intent_cache().stats(), gauges=("size",)
+)
+register_collector("vyapar_intent_resolutions", "Questions resolved per intent source.", "source", resolution_stats)
+register_collector("vyapar_llm_attempts", "LLM intent attempts, retries, hedges and timeouts.", "event", llm_stats)
+register_collector(
+	"vyapar_result_cache",
+	"run_query result cache and single-flight counters.",
+	"kind",
+	lambda: get_result_cache().stats(),
+	gauges=("size",),
+)
+register_collector("vyapar_speculation", "Speculative data fetches by outcome.", "outcome", speculation_stats)
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+	"""Collect per-stage timings and report them in a Server-Timing header."""
+	timings = start_request_timings()
+	started = time.perf_counter()
+	response = await call_next(request)
+	elapsed = time.perf_counter() - started
+
+	# Label by route template so unmatched/scanner paths can't grow the series set
+	route = request.scope.get("route")
+	REQUEST_SECONDS.observe(elapsed, path=route.path if route is not None else "unmatched")
+	timings.append(("total", elapsed * 1000, ""))
+	response.headers["Server-Timing"] = server_timing_header(timings)
+	return response
+
 
 @app.get("/health")
 def health_check():
 	"""Simple health endpoint."""
 	return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+	"""Prometheus-style counters and latency histograms."""
+	return render_metrics()
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+
+from app.core.log import log_event
+from app.core.metrics import stage
+from app.core.settings import get_settings
+from .query_engine import (
+    METRIC_SOURCES,
+    AggregationUnavailable,
+    aggregate_select,
+    attribution_enabled,
+    compute_metric,
+    fetch_plan,
+    previous_window,
+    resolve_window,
+    run_attribution,
+    run_query,
+)
+from .result_cache import get_result_cache, result_ttl
+from .rollup_store import ROLLUP_SOURCES, get_rollup_store
+from .supabase import supabase_request
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WindowNeed:
+    """
+    Everything a batch needs from one table over one date window.
+    """
+
+    columns: set = field(default_factory=set)
+    # Shortest result-cache TTL among the intents sharing the window
+    ttl: float = float("inf")
+
+
+def intent_key(intent: dict) -> str:
+    """
+    Stable key so identical intents collapse to one.
+    """
+    return json.dumps(intent, sort_keys=True)
+
+
+def plan_batch(intents: list[dict]) -> dict[tuple[str, date, date], WindowNeed]:
+    """
+    Group the data needs of all intents by (table, start, end).
+
+    Breakdown intents are answered by run_query() (grouped selects or
+    rollups), and with drivers on the previous total comes from
+    run_attribution(), so those windows are not planned here.
+    """
+    needs: dict[tuple[str, date, date], WindowNeed] = {}
+    for intent in intents:
+        if intent.get("metric") not in METRIC_SOURCES:
+            continue
+        table, column = METRIC_SOURCES[intent["metric"]]
+        _, time_range, breakdown, wants_why = fetch_plan(intent)
+
+        windows = []
+        if breakdown not in ("product", "category"):
+            windows.append(resolve_window(time_range))
+        if wants_why and not attribution_enabled(intent):
+            windows.append(previous_window(time_range))
+
+        for window in windows:
+            need = needs.setdefault((table, *window), WindowNeed())
+            if column:
+                need.columns.add(column)
+            need.ttl = min(need.ttl, result_ttl(time_range))
+    return needs
+
+
+async def fetch_window(table: str, start: date, end: date, need: WindowNeed) -> dict:
+    """
+    One round trip for a (table, window): either {"count", "sums"} from a
+    combined aggregate select, or {"rows"} projected to the needed columns.
+    """
+    filters = [
+        ("date", f"gte.{start.isoformat()}"),
+        ("date", f"lt.{end.isoformat()}"),
+    ]
+
+    store = get_rollup_store()
+    if (
+        store is not None
+        and need.columns <= {ROLLUP_SOURCES[table]["value"]}
+        and store.is_fresh(table, get_settings().rollup_max_staleness)
+    ):
+        with stage("rollup"):
+            count, total = await asyncio.to_thread(store.totals, table, start, end)
+        return {"count": count, "sums": {column: total for column in need.columns}}
+
+    # e.g. select=count(),revenue_sum:revenue.sum() serves sales and revenue together
+    select = ",".join(["count()"] + [f"{c}_sum:{c}.sum()" for c in sorted(need.columns)])
+    try:
+        body = await aggregate_select(table, filters, select)
+    except AggregationUnavailable as exc:
+        log_event(logger, "batch_aggregation_unavailable", table=table, error=str(exc)[:200])
+    else:
+        if isinstance(body, list) and len(body) == 1 and "count" in body[0]:
+            return {
+                "count": body[0]["count"],
+                "sums": {c: body[0].get(f"{c}_sum") or 0 for c in need.columns},
+            }
+        log_event(logger, "batch_aggregation_unavailable", table=table, error=f"Unexpected body: {body!r}"[:200])
+
+    # Fallback: only the summed columns, totalled locally
+    select = ",".join(sorted(need.columns)) or "date"
+    response = await supabase_request(table, [*filters, ("select", select)])
+    response.raise_for_status()
+    return {"rows": response.json()}
+
+
+async def cached_window(table: str, start: date, end: date, need: WindowNeed) -> dict:
+    """
+    fetch_window() through the shared result cache: concurrent batches
+    share one in-flight fetch and repeats within the TTL are free.
+    """
+    key = (table, start, end, "window", tuple(sorted(need.columns)))
+    return await get_result_cache().get_or_load(key, need.ttl, partial(fetch_window, table, start, end, need))
+
+
+def _metric_value(data: dict, column: str | None):
+    if "rows" in data:
+        return compute_metric(data["rows"], column)
+    return data["count"] if column is None else data["sums"][column]
+
+
+async def run_batch(intents: list[dict]) -> dict[str, dict]:
+    """
+    Fetch data for many intents with one request per distinct (table, window).
+
+    Returns results keyed by intent_key(), in the same shape as fetch_data().
+    """
+    unique = {intent_key(intent): intent for intent in intents}
+    needs = plan_batch(list(unique.values()))
+
+    keys = list(needs)
+    known = {key: intent for key, intent in unique.items() if intent.get("metric") in METRIC_SOURCES}
+    why_keys = [key for key, intent in known.items() if fetch_plan(intent)[3] and attribution_enabled(intent)]
+    breakdown_keys = [key for key, intent in known.items() if intent.get("breakdown") in ("product", "category")]
+    fetched, attributions, grouped = await asyncio.gather(
+        asyncio.gather(*(cached_window(*key, needs[key]) for key in keys)),
+        asyncio.gather(*(run_attribution(known[key]) for key in why_keys)),
+        asyncio.gather(*(run_query(known[key]) for key in breakdown_keys)),
+    )
+    data_for = dict(zip(keys, fetched))
+    attribution_for = dict(zip(why_keys, attributions))
+    breakdown_for = dict(zip(breakdown_keys, grouped))
+
+    results = {}
+    for key, intent in unique.items():
+        if intent.get("metric") not in METRIC_SOURCES:
+            results[key] = {"value": 0, "rows": [], "previous_value": 0}
+            continue
+
+        table, column = METRIC_SOURCES[intent["metric"]]
+        _, time_range, _, wants_why = fetch_plan(intent)
+
+        with stage("aggregate"):
+            if key in breakdown_for:
+                # Copy: the cached run_query result is shared
+                result = dict(breakdown_for[key])
+            else:
+                current = data_for[(table, *resolve_window(time_range))]
+                result = {
+                    "value": _metric_value(current, column),
+                    "rows": [],
+                }
+            if key in attribution_for:
+                result["previous_value"] = attribution_for[key]["previous_value"]
+                result["drivers"] = attribution_for[key]["drivers"]
+            elif wants_why:
+                previous = data_for[(table, *previous_window(time_range))]
+                result["previous_value"] = _metric_value(previous, column)
+                result["drivers"] = {}
+        results[key] = result
+
+    return results
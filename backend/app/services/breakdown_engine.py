@@ -0,0 +1,115 @@
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+OTHERS = "others"
+
+
+def _factorize(keys: list) -> tuple[list, "np.ndarray"]:
+    """
+    Map keys to dense integer codes (first-seen order). The dict/map work
+    runs in C, which beats np.unique's sort on short string keys.
+    """
+    index = {key: code for code, key in enumerate(dict.fromkeys(keys))}
+    codes = np.fromiter(map(index.__getitem__, keys), dtype=np.intp, count=len(keys))
+    return list(index), codes
+
+
+def _as_weights(values: list) -> "np.ndarray":
+    try:
+        weights = np.asarray(values, dtype=float)
+    except TypeError:
+        # None in the column; treat missing amounts as zero
+        weights = np.fromiter((v or 0 for v in values), dtype=float, count=len(values))
+    return np.nan_to_num(weights)
+
+
+def _group_numpy(keys: list, values: list | None) -> tuple[list, list, list]:
+    groups, codes = _factorize(keys)
+    counts = np.bincount(codes, minlength=len(groups))
+    if values is None:
+        totals = counts
+    else:
+        totals = np.bincount(codes, weights=_as_weights(values), minlength=len(groups))
+    return groups, counts.tolist(), totals.tolist()
+
+
+def _group_python(keys: list, values: list | None) -> tuple[list, list, list]:
+    counts: dict = {}
+    totals: dict = {}
+    for i, key in enumerate(keys):
+        counts[key] = counts.get(key, 0) + 1
+        totals[key] = totals.get(key, 0) + (1 if values is None else (values[i] or 0))
+    groups = list(counts)
+    return groups, [counts[g] for g in groups], [totals[g] for g in groups]
+
+
+def group_sum(keys: list, values: list | None = None) -> tuple[list, list, list]:
+    """
+    Group parallel key/value columns (keys must be hashable).
+
+    Returns (groups, row counts, totals); with values=None the total is the
+    row count. Uses NumPy when available.
+    """
+    if not keys:
+        return [], [], []
+    if np is not None:
+        return _group_numpy(keys, values)
+    return _group_python(keys, values)
+
+
+def top_groups(groups: list, counts: list, totals: list, by: str, top_n: int = 10) -> list[dict]:
+    """
+    Sort groups by total (descending, ties by key) and fold everything past
+    top_n into a single "others" bucket. The bucket also carries "groups",
+    the number of keys folded into it, which tells it apart from a real
+    key named "others". Empty/None keys are shown as "unknown".
+    """
+    order = sorted(range(len(groups)), key=lambda i: (-totals[i], str(groups[i])))
+
+    result = [
+        {by: str(groups[i]) if groups[i] not in ("", None) else "unknown", "value": round(totals[i], 2), "rows": counts[i]}
+        for i in order[:top_n]
+    ]
+
+    rest = order[top_n:]
+    if rest:
+        result.append({
+            by: OTHERS,
+            "value": round(sum(totals[i] for i in rest), 2),
+            "rows": sum(counts[i] for i in rest),
+            "groups": len(rest),
+        })
+    return result
+
+
+def compute_breakdown(rows: list[dict], by: str, value_column: str | None, top_n: int = 10) -> list[dict]:
+    """
+    Group fetched rows by `by` (product/category) and sum `value_column`
+    (None counts rows). Rows are pivoted into columns once, then grouped.
+    """
+    keys = [r.get(by) or "" for r in rows]
+    values = None if value_column is None else [r.get(value_column) for r in rows]
+    groups, counts, totals = group_sum(keys, values)
+    return top_groups(groups, counts, totals, by, top_n)
+
+
+def merge_periods(
+    current_keys: list, current_values: list, previous_keys: list, previous_values: list
+) -> tuple[list, list, list]:
+    """
+    Total two periods' key/value columns per key in a single grouping pass.
+
+    Inputs can be raw rows or already-grouped totals. Returns (groups,
+    current totals, previous totals); keys missing from a period total 0.
+    Pure Python on purpose: factorizing two key lists for NumPy costs more
+    than the dict pass itself (see bench.bench_breakdown).
+    """
+    sums: dict = {}
+    for period, keys, values in ((0, current_keys, current_values), (1, previous_keys, previous_values)):
+        for key, value in zip(keys, values):
+            sums.setdefault(key, [0.0, 0.0])[period] += value or 0
+    groups = list(sums)
+    return groups, [sums[g][0] for g in groups], [sums[g][1] for g in groups]
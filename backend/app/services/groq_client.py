@@ -1,14 +1,19 @@
-import os
-from groq import Groq
+from app.core.clients import get_groq_client
+from app.core.settings import get_settings
 
 
-def get_groq_response(system_prompt: str, user_prompt: str) -> str:
+async def get_groq_response(system_prompt: str, user_prompt: str, json_mode: bool = True) -> str:
     """
     Send a request to Groq LLM and return the raw text response.
+
+    Completions are deterministic (temperature 0) and capped at
+    LLM_MAX_TOKENS; with json_mode the model is constrained to emit a
+    single JSON object.
     
     Args:
         system_prompt: System message to guide the model's behavior
         user_prompt: User's actual question or prompt
+        json_mode: Constrain the output to a JSON object
         
     Returns:
         str: Raw text response from the model
@@ -16,18 +21,19 @@ def get_groq_response(system_prompt: str, user_prompt: str) -> str:
     Raises:
         ValueError: If GROQ_API_KEY environment variable is not set
     """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY environment variable is not set")
-    
-    client = Groq(api_key=api_key)
+    client = get_groq_client()
+    settings = get_settings()
+    options = {"response_format": {"type": "json_object"}} if json_mode else {}
     
-    response = client.chat.completions.create(
-        model="llama3-8b-8192",
+    response = await client.chat.completions.create(
+        model=settings.groq_model,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
+        temperature=0,
+        max_tokens=settings.llm_max_tokens,
+        **options,
     )
     
     return response.choices[0].message.content
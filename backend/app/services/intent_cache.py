@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.core.log import log_event
+from app.core.settings import get_settings
+from .intent_extractor import KNOWN_TIME_RANGES
+
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Longest phrases first so "last seven days" wins over any shorter overlap
+_TIME_SYNONYMS = sorted(KNOWN_TIME_RANGES.items(), key=lambda item: -len(item[0]))
+
+
+def normalize_question(question: str) -> str:
+    """
+    Canonical cache key for a question: lowercase, no punctuation,
+    single spaces and time-range synonyms mapped to their intent value.
+    """
+    q = _PUNCTUATION.sub(" ", question.lower())
+    q = _WHITESPACE.sub(" ", q).strip()
+    padded = f" {q} "
+    for phrase, value in _TIME_SYNONYMS:
+        padded = padded.replace(f" {phrase} ", f" {value} ")
+    return padded.strip()
+
+
+class IntentCache:
+    """
+    Bounded LRU + TTL cache of validated intents keyed by normalized question.
+
+    When `path` is given, entries also persist to a SQLite file so the cache
+    survives restarts. The file is read once at construction; after that
+    lookups only touch memory, and inserts/evictions are written behind in
+    batches on a worker thread, off the event loop.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0, path: str | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._db = None
+        # key -> entry to upsert, or None to delete; drained by _write_behind()
+        self._pending: dict[str, tuple[float, dict] | None] = {}
+        self._writer: asyncio.Task | None = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS intent_cache ("
+                "key TEXT PRIMARY KEY, intent TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._load()
+
+    def get(self, question: str) -> dict | None:
+        """
+        Return a cached intent for the question, or None on miss/expiry.
+        """
+        if self.max_size <= 0:
+            self.misses += 1
+            return None
+
+        key = normalize_question(question)
+        entry = self._entries.get(key)
+
+        if entry is None or time.time() - entry[0] > self.ttl:
+            if entry is not None:
+                self._forget(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, question: str, intent: dict) -> None:
+        """
+        Store a validated intent. Callers must not pass clarification results.
+        """
+        if self.max_size <= 0:
+            return
+
+        key = normalize_question(question)
+        entry = (time.time(), dict(intent))
+        self._remember(key, entry)
+        self._persist(key, entry)
+
+    async def flush(self) -> None:
+        """
+        Wait until every pending write has reached the SQLite file.
+        """
+        if self._pending and self._writer is None:
+            self._writer = asyncio.get_running_loop().create_task(self._write_behind())
+        while self._writer is not None:
+            await asyncio.shield(self._writer)
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and current size.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _load(self) -> None:
+        """
+        Warm memory with the newest unexpired entries and drop expired ones.
+        """
+        cutoff = time.time() - self.ttl
+        with self._db:
+            self._db.execute("DELETE FROM intent_cache WHERE stored_at < ?", (cutoff,))
+        rows = self._db.execute(
+            "SELECT key, stored_at, intent FROM intent_cache ORDER BY stored_at DESC LIMIT ?",
+            (max(self.max_size, 0),),
+        ).fetchall()
+        for key, stored_at, intent in reversed(rows):
+            self._entries[key] = (stored_at, json.loads(intent))
+
+    def _remember(self, key: str, entry: tuple[float, dict]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._persist(evicted, None)
+
+    def _forget(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._persist(key, None)
+
+    def _persist(self, key: str, entry: tuple[float, dict] | None) -> None:
+        if self._db is None:
+            return
+        self._pending[key] = entry
+        if self._writer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, startup): write straight through
+            self._write(self._drain())
+            return
+        self._writer = loop.create_task(self._write_behind())
+
+    def _drain(self) -> dict:
+        batch, self._pending = self._pending, {}
+        return batch
+
+    async def _write_behind(self) -> None:
+        try:
+            while self._pending:
+                batch = self._drain()
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except sqlite3.Error as exc:
+                    log_event(logger, "intent_cache_write_failed", logging.WARNING, error=str(exc), entries=len(batch))
+        finally:
+            self._writer = None
+
+    def _write(self, batch: dict) -> None:
+        """
+        Apply a batch of upserts/deletes in one transaction (one commit).
+        """
+        upserts = [(key, json.dumps(entry[1]), entry[0]) for key, entry in batch.items() if entry is not None]
+        deletes = [(key,) for key, entry in batch.items() if entry is None]
+        with self._db:
+            if deletes:
+                self._db.executemany("DELETE FROM intent_cache WHERE key = ?", deletes)
+            if upserts:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO intent_cache (key, intent, stored_at) VALUES (?, ?, ?)", upserts
+                )
+
+
+@lru_cache(maxsize=1)
+def get_intent_cache() -> IntentCache:
+    """
+    Process-wide intent cache configured from settings.
+    """
+    settings = get_settings()
+    return IntentCache(
+        max_size=settings.intent_cache_size,
+        ttl=settings.intent_cache_ttl,
+        path=settings.intent_cache_path or None,
+    )
@@ -1,9 +1,8 @@
 import json
-import re
 from .groq_client import get_groq_response
+from .intent_parser import parse_intent
 
 
-KNOWN_METRICS = ["revenue", "profit", "expenses", "sales"]
 KNOWN_TIME_RANGES = {
     "today": "today",
     "last 7 days": "last_7_days",
@@ -18,40 +17,13 @@ def fallback_intent(question: str) -> dict | None:
     Deterministic fallback if LLM asks for clarification
     but question clearly contains intent.
     """
-    q = question.lower()
+    return parse_intent(question).intent
 
-    metric = None
-    for m in KNOWN_METRICS:
-        if m in q:
-            metric = m
-            break
 
-    time_range = None
-    for phrase, value in KNOWN_TIME_RANGES.items():
-        if phrase in q:
-            time_range = value
-            break
+SYSTEM_PROMPT = """You are an intent extractor for MSME business analytics queries.
 
-    if metric and time_range:
-        return {
-            "metric": metric,
-            "time_range": time_range,
-            "comparison": "none",
-            "breakdown": "none",
-            "why_analysis": "why" in q,
-        }
-
-    return None
-
-
-def extract_intent(question: str) -> dict:
-    """
-    Extract structured intent from a natural-language business question.
-    """
-
-    system_prompt = """You are an intent extractor for MSME business analytics queries.
-
-Return ONLY valid JSON.
+Return ONLY one JSON object with exactly these keys:
+{"metric": ..., "time_range": ..., "comparison": ..., "breakdown": ..., "why_analysis": ...}
 
 Allowed values:
 - metric: revenue | profit | expenses | sales
@@ -71,21 +43,26 @@ Rules:
 - No markdown.
 """
 
-    try:
-        response = get_groq_response(system_prompt, question)
-        intent = json.loads(response)
 
-        # 🔒 Deterministic fallback if LLM is too strict
-        if intent.get("clarification_required") is True:
-            forced = fallback_intent(question)
-            if forced:
-                return forced
+async def request_intent(question: str) -> dict:
+    """
+    One LLM call: the model's intent for a question, parsed from JSON.
 
-        return intent
+    A clarification request is replaced by the deterministic parse when
+    the question clearly contains intent.
+
+    Raises:
+        ValueError: If the completion is not a JSON object
+    """
+    response = await get_groq_response(SYSTEM_PROMPT, question)
+    intent = json.loads(response)
+    if not isinstance(intent, dict):
+        raise ValueError("Intent is not a JSON object")
 
-    except Exception:
+    # 🔒 Deterministic fallback if LLM is too strict
+    if intent.get("clarification_required") is True:
         forced = fallback_intent(question)
         if forced:
             return forced
 
-        return {"clarification_required": True}
+    return intent
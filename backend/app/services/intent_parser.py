@@ -0,0 +1,184 @@
+import re
+from dataclasses import dataclass
+
+
+# Canonical value -> phrases (English, Hindi and Hinglish spellings)
+METRIC_SYNONYMS = {
+    "revenue": [
+        "revenue", "income", "earnings", "earning", "turnover",
+        "kamai", "kamaai", "aamdani", "amdani", "aay",
+    ],
+    "profit": [
+        "profit", "profits", "margin", "net income",
+        "munafa", "munaafa", "munafe", "fayda", "faayda", "labh",
+    ],
+    "expenses": [
+        "expenses", "expense", "spend", "spending", "spent", "costs", "cost",
+        "kharcha", "kharche", "kharch", "kharchaa", "vyay",
+    ],
+    "sales": [
+        "sales", "sale", "orders", "order", "bills",
+        "bikri", "bikree", "bikaai", "becha", "beche",
+    ],
+}
+
+TIME_SYNONYMS = {
+    "today": [
+        "today", "todays", "aaj", "aj", "aaj ka", "aaj ki", "aaj ke",
+    ],
+    "last_7_days": [
+        "last 7 days", "last seven days", "last week", "past week", "past 7 days",
+        "previous week", "pichle hafte", "pichhle hafte", "pichla hafta",
+        "pichle 7 din", "pichhle 7 din", "pichle saat din",
+    ],
+    "last_month": [
+        "last month", "previous month", "past month",
+        "pichle mahine", "pichhle mahine", "pichla mahina", "pichhla mahina",
+    ],
+}
+
+# Periods the schema can't express; their presence makes a parse ambiguous
+UNSUPPORTED_TIME_CUES = [
+    "yesterday", "tomorrow", "this week", "this month", "this year", "last year",
+    "quarter", "kal", "parso", "is mahine", "is hafte",
+]
+
+BREAKDOWN_SYNONYMS = {
+    "product": [
+        "by product", "per product", "product wise", "productwise", "each product",
+        "by item", "per item", "item wise", "itemwise", "each item", "top products",
+    ],
+    "category": [
+        "by category", "per category", "category wise", "categorywise",
+        "each category", "by categories", "top categories",
+    ],
+}
+
+COMPARISON_CUES = [
+    "compare", "compared", "comparison", "vs", "versus", "than before",
+    "previous period", "change", "changed", "growth",
+    "mukable", "mukabale", "tulna", "badla",
+]
+
+WHY_CUES = ["why", "reason", "how come", "kyun", "kyon", "kyu", "kis wajah", "wajah"]
+
+# Which way a number moved; "why" questions use them but the schema has no
+# direction, so they are understood without changing the intent
+DIRECTION_WORDS = [
+    "up", "down", "drop", "dropped", "fell", "fall", "rise", "rose", "grew",
+    "increase", "increased", "decrease", "decreased", "badha", "badhi", "ghata", "ghati",
+]
+
+# Filler words that carry no intent; they count as "understood" for coverage
+STOPWORDS = {
+    "what", "was", "is", "are", "were", "my", "the", "for", "how", "much", "many",
+    "did", "do", "i", "we", "our", "me", "show", "tell", "give", "total", "in", "of",
+    "a", "an", "to", "and", "it", "this", "that", "with", "please", "so", "far",
+    "make", "made", "get", "got", "have", "has", "been", "there", "on", "at",
+    "kya", "kitna", "kitni", "kitne", "tha", "thi", "hai", "hain", "mera",
+    "meri", "mere", "ka", "ki", "ke", "ko", "se", "mein", "batao", "bataiye",
+    "dikhao", "hua", "hue", "kaisa", "kaisi", "raha", "rahi", "rahe",
+    "aaya", "aaye", "aayi", "hui", "kam", "zyada", "by", "over", "before", "s",
+}
+
+# Ceiling for parses that leave a content word unexplained: the word may be
+# a filter or measure the schema can't express ("sales of tea", "average
+# order value"), so the LLM should see the question
+UNEXPLAINED_CONFIDENCE = 0.5
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class ParseResult:
+    """
+    Outcome of the rule-based parser.
+
+    `intent` is only set when both metric and time range were found;
+    `confidence` (0..1) says whether it is safe to skip the LLM.
+    """
+
+    intent: dict | None
+    confidence: float
+
+
+def tokenize(question: str) -> list[str]:
+    """
+    Lowercase, strip punctuation and split on whitespace.
+    """
+    q = _PUNCTUATION.sub(" ", question.lower())
+    return _WHITESPACE.sub(" ", q).strip().split(" ") if q.strip() else []
+
+
+def _find(text: str, synonyms: dict) -> list[tuple[int, str, str]]:
+    """
+    Return (position, canonical value, phrase) for each synonym found in text.
+    """
+    matches = []
+    for value, phrases in synonyms.items():
+        for phrase in phrases:
+            for match in re.finditer(rf"(?<!\w){re.escape(phrase)}(?!\w)", text):
+                matches.append((match.start(), value, phrase))
+    return sorted(matches)
+
+
+def _has_cue(text: str, cues: list[str]) -> list[str]:
+    return [cue for cue in cues if re.search(rf"(?<!\w){re.escape(cue)}(?!\w)", text)]
+
+
+def parse_intent(question: str) -> ParseResult:
+    """
+    Deterministically parse a business question into an intent.
+
+    Confidence rewards exactly one metric and one time range and is capped
+    at UNEXPLAINED_CONFIDENCE when any word is not a known phrase, cue or
+    stopword, so anything unusual goes to the LLM.
+    """
+    tokens = tokenize(question)
+    if not tokens:
+        return ParseResult(None, 0.0)
+    text = " ".join(tokens)
+
+    metrics = _find(text, METRIC_SYNONYMS)
+    times = _find(text, TIME_SYNONYMS)
+    breakdowns = _find(text, BREAKDOWN_SYNONYMS)
+    comparison_cues = _has_cue(text, COMPARISON_CUES)
+    why_cues = _has_cue(text, WHY_CUES)
+    unsupported_times = _has_cue(text, UNSUPPORTED_TIME_CUES)
+
+    # Coverage: share of tokens explained by a phrase, cue or stopword
+    understood = STOPWORDS | set(DIRECTION_WORDS)
+    for _, _, phrase in metrics + times + breakdowns:
+        understood.update(phrase.split())
+    for cue in comparison_cues + why_cues + unsupported_times:
+        understood.update(cue.split())
+    coverage = sum(1 for t in tokens if t in understood) / len(tokens)
+
+    def score(matches: list, weight: float) -> float:
+        distinct = {value for _, value, _ in matches}
+        if len(distinct) == 1:
+            return weight
+        if len(distinct) > 1:
+            return weight * 0.3
+        return 0.0
+
+    distinct_breakdowns = {value for _, value, _ in breakdowns}
+    time_score = score(times, 0.35) * (0.3 if unsupported_times else 1.0)
+    confidence = score(metrics, 0.45) + time_score + 0.2 * coverage
+    if len(distinct_breakdowns) > 1:
+        confidence -= 0.2
+    if coverage < 1:
+        confidence = min(confidence, UNEXPLAINED_CONFIDENCE)
+
+    if not metrics or not times:
+        return ParseResult(None, round(max(confidence, 0.0), 3))
+
+    intent = {
+        "metric": metrics[0][1],
+        "time_range": times[0][1],
+        "comparison": "previous_period" if comparison_cues else "none",
+        "breakdown": breakdowns[0][1] if breakdowns else "none",
+        "why_analysis": bool(why_cues),
+    }
+    return ParseResult(intent, round(max(confidence, 0.0), 3))
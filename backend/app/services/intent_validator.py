@@ -1,70 +1,219 @@
-from .intent_extractor import extract_intent
+import asyncio
+import time
+from collections import deque
 
+from app.core.metrics import stage
+from app.core.settings import get_settings
+from .intent_cache import get_intent_cache
+from .intent_extractor import fallback_intent, request_intent
+from .intent_parser import parse_intent
 
-def validate_intent(question: str) -> dict:
+
+ALLOWED_METRICS = {"revenue", "profit", "expenses", "sales"}
+ALLOWED_TIME_RANGES = {"today", "last_7_days", "last_month"}
+ALLOWED_COMPARISONS = {"none", "previous_period"}
+ALLOWED_BREAKDOWNS = {"none", "product", "category"}
+
+# How each question was resolved: cache, rule-based fast path or LLM
+_resolution_counts = {"cache": 0, "fast_path": 0, "llm": 0}
+
+# LLM attempt outcomes: retries after a failed attempt, hedges fired while
+# one was slow, per-attempt timeouts, errors (malformed/invalid output) and
+# questions answered by the parser because no attempt validated in budget
+_llm_counts = {"attempts": 0, "retries": 0, "hedges": 0, "timeouts": 0, "errors": 0, "fallbacks": 0}
+
+# Recent successful attempt latencies (seconds), for the hedge delay
+_latencies: deque = deque(maxlen=200)
+MIN_HEDGE_SAMPLES = 20
+
+
+def is_valid_intent(intent: dict) -> bool:
+    """Check if intent dict has valid structure and values."""
+    if not isinstance(intent, dict):
+        return False
+
+    # Check for clarification_required
+    if "clarification_required" in intent:
+        return intent.get("clarification_required") is True and len(intent) == 1
+
+    # Check all required fields are present
+    required_fields = {"metric", "time_range", "comparison", "breakdown", "why_analysis"}
+    if not required_fields.issubset(intent.keys()):
+        return False
+
+    # Validate enum values
+    if intent.get("metric") not in ALLOWED_METRICS:
+        return False
+    if intent.get("time_range") not in ALLOWED_TIME_RANGES:
+        return False
+    if intent.get("comparison") not in ALLOWED_COMPARISONS:
+        return False
+    if intent.get("breakdown") not in ALLOWED_BREAKDOWNS:
+        return False
+    if not isinstance(intent.get("why_analysis"), bool):
+        return False
+
+    return True
+
+
+def resolve_local_intent(question: str) -> dict | None:
+    """
+    Resolve a question without the LLM: intent cache first, then the
+    rule-based parser when it is confident. Returns None if neither applies.
+    """
+    cache = get_intent_cache()
+    with stage("intent_cache"):
+        cached = cache.get(question)
+    if cached is not None:
+        _resolution_counts["cache"] += 1
+        return cached
+
+    settings = get_settings()
+    if settings.fast_path_enabled:
+        with stage("intent_parse"):
+            parsed = parse_intent(question)
+        if parsed.confidence >= settings.fast_path_confidence and is_valid_intent(parsed.intent):
+            _resolution_counts["fast_path"] += 1
+            cache.put(question, parsed.intent)
+            return parsed.intent
+
+    return None
+
+
+def hedge_delay() -> float:
+    """
+    Seconds to wait on an attempt before hedging: the p95 of recent
+    successful attempts, or LLM_HEDGE_DELAY until enough are observed.
+    """
+    if len(_latencies) < MIN_HEDGE_SAMPLES:
+        return get_settings().llm_hedge_delay
+    ordered = sorted(_latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+async def _attempt(question: str, number: int, timeout: float) -> dict | None:
+    """
+    One bounded LLM attempt. Returns the intent if it validates, else None.
+    """
+    _llm_counts["attempts"] += 1
+    started = time.perf_counter()
+    with stage("llm", f"attempt {number}"):
+        try:
+            intent = await asyncio.wait_for(request_intent(question), timeout)
+        except asyncio.TimeoutError:
+            _llm_counts["timeouts"] += 1
+            return None
+        except Exception:
+            _llm_counts["errors"] += 1
+            return None
+
+    # Clarification is a valid answer too
+    with stage("validate"):
+        valid = is_valid_intent(intent)
+    if not valid:
+        _llm_counts["errors"] += 1
+        return None
+    _latencies.append(time.perf_counter() - started)
+    return intent
+
+
+async def _first_valid_intent(question: str, deadline: float) -> dict | None:
+    """
+    Run attempts until one validates, retrying after failures and (when
+    LLM_HEDGING is on) hedging slow attempts. Losing attempts are cancelled.
+    """
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+    pending: set[asyncio.Task] = set()
+    launched = 0
+
+    def launch() -> None:
+        nonlocal launched
+        launched += 1
+        timeout = min(settings.llm_attempt_timeout, deadline - loop.time())
+        pending.add(asyncio.create_task(_attempt(question, launched, timeout)))
+
+    launch()
+    try:
+        while pending:
+            can_launch = launched < settings.llm_max_attempts
+            wait_for = hedge_delay() if settings.llm_hedging and can_launch else None
+            done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                _llm_counts["hedges"] += 1
+                launch()
+                continue
+
+            for task in done:
+                pending.discard(task)
+                intent = task.result()
+                if intent is not None:
+                    return intent
+
+            if not pending and can_launch and deadline - loop.time() > 0:
+                _llm_counts["retries"] += 1
+                launch()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def extract_validated_intent(question: str) -> dict:
+    """
+    Ask the LLM for an intent within the LLM_BUDGET latency budget.
+
+    Each attempt is bounded by LLM_ATTEMPT_TIMEOUT; failed attempts are
+    retried up to LLM_MAX_ATTEMPTS. If no attempt validates in time, the
+    deterministic parser answers instead. Valid LLM intents are cached.
+    """
+    _resolution_counts["llm"] += 1
+    budget = get_settings().llm_budget
+    deadline = asyncio.get_running_loop().time() + budget
+    try:
+        intent = await asyncio.wait_for(_first_valid_intent(question, deadline), budget)
+    except asyncio.TimeoutError:
+        intent = None
+
+    if intent is None:
+        _llm_counts["fallbacks"] += 1
+        forced = fallback_intent(question)
+        return forced if is_valid_intent(forced) else {"clarification_required": True}
+
+    if intent.get("clarification_required") is not True:
+        get_intent_cache().put(question, intent)
+    return intent
+
+
+async def validate_intent(question: str) -> dict:
     """
     Validate and extract intent from a business question with retry logic.
-    
+
+    Repeat questions are answered from the intent cache, and confident
+    rule-based parses skip the LLM; only ambiguous questions reach Groq.
+    Only validated (non-clarification) intents are cached.
+
     Args:
         question: User's natural language business question
-        
+
     Returns:
         dict: Valid intent dictionary or {"clarification_required": true}
     """
-    allowed_metrics = {"revenue", "profit", "expenses", "sales"}
-    allowed_time_ranges = {"today", "last_7_days", "last_month"}
-    allowed_comparisons = {"none", "previous_period"}
-    allowed_breakdowns = {"none", "product", "category"}
-    
-    def is_valid_intent(intent: dict) -> bool:
-        """Check if intent dict has valid structure and values."""
-        if not isinstance(intent, dict):
-            return False
-        
-        # Check for clarification_required
-        if "clarification_required" in intent:
-            return intent.get("clarification_required") is True and len(intent) == 1
-        
-        # Check all required fields are present
-        required_fields = {"metric", "time_range", "comparison", "breakdown", "why_analysis"}
-        if not required_fields.issubset(intent.keys()):
-            return False
-        
-        # Validate enum values
-        if intent.get("metric") not in allowed_metrics:
-            return False
-        if intent.get("time_range") not in allowed_time_ranges:
-            return False
-        if intent.get("comparison") not in allowed_comparisons:
-            return False
-        if intent.get("breakdown") not in allowed_breakdowns:
-            return False
-        if not isinstance(intent.get("why_analysis"), bool):
-            return False
-        
-        return True
-    
-    # First extraction attempt
-    intent = extract_intent(question)
-    
-    # Check if clarification is required
-    if isinstance(intent, dict) and intent.get("clarification_required") is True:
-        return intent
-    
-    # Validate intent
-    if is_valid_intent(intent):
-        return intent
-    
-    # Retry once
-    intent = extract_intent(question)
-    
-    # Check if clarification is required after retry
-    if isinstance(intent, dict) and intent.get("clarification_required") is True:
-        return intent
-    
-    # Validate after retry
-    if is_valid_intent(intent):
-        return intent
-    
-    # Return clarification required if still invalid
-    return {"clarification_required": True}
+    local = resolve_local_intent(question)
+    if local is not None:
+        return local
+    return await extract_validated_intent(question)
+
+
+def resolution_stats() -> dict:
+    """
+    Counts of questions resolved by cache, fast path and LLM.
+    """
+    return dict(_resolution_counts)
+
+
+def llm_stats() -> dict:
+    """
+    LLM attempt, retry, hedge and timeout counts.
+    """
+    return dict(_llm_counts)
@@ -1,78 +1,406 @@
-import os
-import httpx
+import asyncio
+import logging
+import time
 from datetime import date, timedelta
+from functools import lru_cache, partial
 
+from app.core.log import log_event
+from app.core.metrics import stage
+from app.core.settings import get_settings
+from .breakdown_engine import group_sum, merge_periods, top_groups
+from .result_cache import get_result_cache, result_ttl
+from .rollup_store import ROLLUP_SOURCES, get_rollup_store
+from .supabase import supabase_request
+from .why_engine import attribute_change
 
-def run_query(intent: dict) -> dict:
+
+logger = logging.getLogger(__name__)
+
+# metric -> (table, column summed for the metric; None means row count)
+METRIC_SOURCES = {
+    "sales": ("sales", None),
+    "revenue": ("sales", "revenue"),
+    "expenses": ("expenses", "amount"),
+}
+
+
+def resolve_window(time_range: str | None, today: date | None = None) -> tuple[date, date]:
     """
-    Run a Supabase REST query based on validated intent.
+    Date window [start, end) for a time range; end is exclusive.
+    """
+    today = today or date.today()
+    tomorrow = today + timedelta(days=1)
+
+    if time_range == "last_7_days":
+        return today - timedelta(days=7), tomorrow
+    if time_range == "last_month":
+        first_this_month = today.replace(day=1)
+        first_last_month = (first_this_month - timedelta(days=1)).replace(day=1)
+        return first_last_month, first_this_month
+    return today, tomorrow
+
+
+def previous_window(time_range: str | None, today: date | None = None) -> tuple[date, date]:
+    """
+    The window immediately before resolve_window(): the previous day,
+    the equally long stretch before the last 7 days, or the month before last.
+    """
+    start, end = resolve_window(time_range, today)
+
+    if time_range == "last_month":
+        return (start - timedelta(days=1)).replace(day=1), start
+    return start - (end - start), start
+
+
+class AggregationUnavailable(Exception):
+    """Raised when PostgREST cannot compute an aggregate server-side."""
+
+
+class AggregateSupport:
+    """
+    Tables whose PostgREST rejected an aggregate select (no
+    `db-aggregates-enabled`, Supabase's default). Aggregates on them are
+    skipped without a round trip until retry_after seconds have passed.
+    """
+
+    def __init__(self, retry_after: float = 300.0):
+        self.retry_after = retry_after
+        self._unavailable_until: dict[str, float] = {}
+
+    def available(self, table: str) -> bool:
+        return self._unavailable_until.get(table, 0.0) <= time.monotonic()
+
+    def mark_unavailable(self, table: str) -> None:
+        self._unavailable_until[table] = time.monotonic() + self.retry_after
+
+
+@lru_cache(maxsize=1)
+def get_aggregate_support() -> AggregateSupport:
+    """
+    Process-wide aggregate capability memory configured from settings.
+    """
+    return AggregateSupport(retry_after=get_settings().aggregate_retry_interval)
+
+
+async def aggregate_select(table: str, params: list, select: str):
+    """
+    GET an aggregate select and return the decoded body.
+
+    A 400 marks the table as lacking aggregate support; while it is marked
+    this raises AggregationUnavailable without contacting PostgREST.
+    """
+    support = get_aggregate_support()
+    if not support.available(table):
+        raise AggregationUnavailable(f"Aggregates unavailable on {table}")
+
+    response = await supabase_request(table, [*params, ("select", select)])
+    if response.status_code == 400:
+        support.mark_unavailable(table)
+        raise AggregationUnavailable(response.text)
+    response.raise_for_status()
+    return response.json()
+
+
+async def _aggregate_count(table: str, params: list) -> int:
+    """
+    Count matching rows via `Prefer: count=exact` without downloading them.
+    """
+    response = await supabase_request(
+        table,
+        [*params, ("select", "date")],
+        method="HEAD",
+        headers={"Prefer": "count=exact"},
+    )
+    response.raise_for_status()
+
+    # Content-Range looks like "0-24/25" or "*/0"
+    content_range = response.headers.get("content-range", "")
+    total = content_range.rpartition("/")[2]
+    if not total.isdigit():
+        raise AggregationUnavailable(f"Unexpected Content-Range: {content_range!r}")
+    return int(total)
+
+
+async def _aggregate_sum(table: str, params: list, column: str) -> float:
+    """
+    Sum a column server-side using a PostgREST aggregate select.
+
+    Requires PostgREST 12+ with `db-aggregates-enabled`; older or locked-down
+    servers answer 400 which we surface as AggregationUnavailable.
+    """
+    body = await aggregate_select(table, params, f"{column}.sum()")
+    if not isinstance(body, list) or len(body) != 1 or "sum" not in body[0]:
+        raise AggregationUnavailable(f"Unexpected aggregate body: {body!r}")
+    return body[0]["sum"] or 0
+
+
+def compute_metric(rows: list, column: str | None):
+    """
+    Client-side aggregation over fetched rows.
+    """
+    if column is None:
+        return len(rows)
+    return sum(r.get(column) or 0 for r in rows)
+
+
+async def _aggregate_grouped(table: str, params: list, by: str, column: str | None) -> tuple[list, list, list]:
+    """
+    Server-side GROUP BY via PostgREST aggregate selects (`product,revenue.sum(),count()`).
+    """
+    select = f"{by},count()" if column is None else f"{by},{column}.sum(),count()"
+    body = await aggregate_select(table, params, select)
+    if not isinstance(body, list) or (body and "count" not in body[0]):
+        raise AggregationUnavailable(f"Unexpected aggregate body: {body!r}")
+
+    groups = [r.get(by) or "" for r in body]
+    counts = [r["count"] for r in body]
+    totals = counts if column is None else [r.get("sum") or 0 for r in body]
+    return groups, counts, totals
+
+
+async def _grouped_totals(
+    table: str, filters: list, column: str | None, by: str, window: tuple[date, date]
+) -> tuple[list, list, list]:
+    """
+    (groups, row counts, totals) of the metric per product/category: rollups
+    if fresh, else a server-side grouped select, else a projected fetch
+    grouped locally.
     """
+    settings = get_settings()
+    store = get_rollup_store()
+    if (
+        store is not None
+        and by in ROLLUP_SOURCES[table]["dimensions"]
+        and store.is_fresh(table, settings.rollup_max_staleness)
+    ):
+        with stage("rollup"):
+            grouped = await asyncio.to_thread(store.group_totals, table, by, *window)
+        groups = [g for g, _, _ in grouped]
+        counts = [c for _, c, _ in grouped]
+        totals = counts if column is None else [t for _, _, t in grouped]
+        return groups, counts, totals
 
-    # 🔒 Read and sanitize env vars
-    supabase_url = os.getenv("SUPABASE_URL", "").strip()
-    anon_key = os.getenv("SUPABASE_ANON_KEY", "").strip()
+    try:
+        return await _aggregate_grouped(table, filters, by, column)
+    except AggregationUnavailable as exc:
+        log_event(logger, "grouped_aggregation_unavailable", table=table, error=str(exc)[:200])
 
-    if not supabase_url.startswith("http"):
-        raise RuntimeError("SUPABASE_URL is invalid or missing protocol")
+    select = by if column is None else f"{by},{column}"
+    response = await supabase_request(table, [*filters, ("select", select)])
+    response.raise_for_status()
+    rows = response.json()
+    with stage("aggregate", "group_by"):
+        keys = [r.get(by) or "" for r in rows]
+        return group_sum(keys, None if column is None else [r.get(column) for r in rows])
 
-    if not anon_key:
-        raise RuntimeError("SUPABASE_ANON_KEY is missing")
 
-    headers = {
-        "apikey": anon_key,
-        "Authorization": f"Bearer {anon_key}",
+async def _run_breakdown(
+    table: str, filters: list, column: str | None, by: str, window: tuple[date, date]
+) -> dict:
+    """
+    Group the metric by product/category into a top-N breakdown.
+    """
+    groups, counts, totals = await _grouped_totals(table, filters, column, by, window)
+
+    with stage("aggregate", "top_n"):
+        breakdown = top_groups(groups, counts, totals, by, get_settings().breakdown_top_n)
+
+    return {
+        "value": sum(totals),
+        "rows": [],
+        "breakdown": breakdown,
     }
 
+
+async def run_query(intent: dict, window: tuple[date, date] | None = None) -> dict:
+    """
+    Run a query for a validated intent through the result cache.
+
+    Identical concurrent queries, keyed by (table, window, metric,
+    breakdown), share one upstream call; finished results are reused
+    for a TTL that depends on the time range. See _execute_query().
+    """
     metric = intent.get("metric")
+    if metric not in METRIC_SOURCES:
+        return {"value": 0, "rows": []}
+
+    table, _ = METRIC_SOURCES[metric]
     time_range = intent.get("time_range")
+    start_date, end_date = window or resolve_window(time_range)
+    key = (table, start_date, end_date, metric, intent.get("breakdown"))
+
+    return await get_result_cache().get_or_load(
+        key,
+        result_ttl(time_range),
+        partial(_execute_query, intent, (start_date, end_date)),
+    )
+
+
+async def _execute_query(intent: dict, window: tuple[date, date] | None = None) -> dict:
+    """
+    Run a Supabase REST query based on validated intent.
+
+    `window` overrides the intent's time range with an explicit
+    [start, end) pair, e.g. the previous period from previous_window().
 
-    today = date.today()
+    Only the aggregate is requested from PostgREST (count via
+    Content-Range, sums via aggregate selects). If the server cannot
+    aggregate we fall back to fetching just the metric column and summing
+    client-side. Detail rows are paged separately (see table_pages).
 
-    if time_range == "today":
-        start_date = today
-    elif time_range == "last_7_days":
-        start_date = today - timedelta(days=7)
-    elif time_range == "last_month":
-        end_last_month = today.replace(day=1) - timedelta(days=1)
-        start_date = end_last_month.replace(day=1)
-    else:
-        start_date = today
+    When the local rollup store is enabled and fresh, queries are answered
+    from it without touching Supabase.
+
+    A `breakdown` of product/category adds a sorted top-N "breakdown"
+    list (with an "others" bucket) to the result.
+    """
+
+    metric = intent.get("metric")
+    breakdown = intent.get("breakdown")
+    start_date, end_date = window or resolve_window(intent.get("time_range"))
 
     # Decide table
-    if metric in ("sales", "revenue"):
-        table = "sales"
-    elif metric == "expenses":
-        table = "expenses"
-    else:
+    if metric not in METRIC_SOURCES:
         return {"value": 0, "rows": []}
+    table, column = METRIC_SOURCES[metric]
 
-    params = {
-        "select": "*",
-        "date": f"gte.{start_date.isoformat()}",
-    }
+    if breakdown not in ("product", "category"):
+        store = get_rollup_store()
+        if store is not None and store.is_fresh(table, get_settings().rollup_max_staleness):
+            with stage("rollup"):
+                count, total = await asyncio.to_thread(store.totals, table, start_date, end_date)
+            return {"value": count if column is None else total, "rows": []}
+
+    filters = [
+        ("date", f"gte.{start_date.isoformat()}"),
+        ("date", f"lt.{end_date.isoformat()}"),
+    ]
 
-    # ✅ SAFE URL BUILD
-    url = f"{supabase_url}/rest/v1/{table}"
+    log_event(logger, "run_query", table=table, filters=filters)
 
-    print("Calling Supabase URL:", url)
-    print("With params:", params)
+    if breakdown in ("product", "category"):
+        return await _run_breakdown(table, filters, column, breakdown, (start_date, end_date))
 
-    with httpx.Client(timeout=10) as client:
-        response = client.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        rows = response.json()
+    try:
+        if column is None:
+            value = await _aggregate_count(table, filters)
+        else:
+            value = await _aggregate_sum(table, filters, column)
+        return {"value": value, "rows": []}
+    except AggregationUnavailable as exc:
+        log_event(logger, "aggregation_unavailable", table=table, error=str(exc)[:200])
 
-    # Calculate metric
-    if metric == "sales":
-        value = len(rows)
-    elif metric == "revenue":
-        value = sum(r.get("revenue", 0) for r in rows)
-    elif metric == "expenses":
-        value = sum(r.get("amount", 0) for r in rows)
-    else:
-        value = 0
+    # Fallback: fetch only the column the metric needs
+    response = await supabase_request(table, [*filters, ("select", column or "date")])
+    response.raise_for_status()
+    rows = response.json()
+    with stage("aggregate"):
+        value = compute_metric(rows, column)
 
     return {
         "value": value,
-        "rows": rows
+        "rows": []
     }
+
+
+async def _window_groups(table: str, column: str | None, by: str, window: tuple[date, date]) -> tuple[list, list]:
+    filters = [
+        ("date", f"gte.{window[0].isoformat()}"),
+        ("date", f"lt.{window[1].isoformat()}"),
+    ]
+    groups, _, totals = await _grouped_totals(table, filters, column, by, window)
+    return groups, totals
+
+
+async def _execute_attribution(table: str, column: str | None, current: tuple, previous: tuple) -> dict:
+    """
+    Group both windows by every dimension of the table concurrently, then
+    attribute the change per dimension.
+
+    Returns {"drivers": {dimension: attribute_change(...)}, "previous_value": total}.
+    """
+    dimensions = ROLLUP_SOURCES[table]["dimensions"]
+    fetched = await asyncio.gather(
+        *(_window_groups(table, column, by, window) for by in dimensions for window in (current, previous))
+    )
+
+    top_n = get_settings().drivers_top_n
+    drivers = {}
+    with stage("attribution"):
+        for i, by in enumerate(dimensions):
+            (current_keys, current_totals), (previous_keys, previous_totals) = fetched[2 * i], fetched[2 * i + 1]
+            groups, current_values, previous_values = merge_periods(
+                current_keys, current_totals, previous_keys, previous_totals
+            )
+            drivers[by] = attribute_change(groups, current_values, previous_values, by, top_n)
+
+    # Any one dimension's groups add up to the window total
+    _, previous_totals = fetched[1]
+    return {"drivers": drivers, "previous_value": sum(previous_totals)}
+
+
+def attribution_enabled(intent: dict) -> bool:
+    """
+    Whether run_attribution() applies: DRIVERS_ENABLED is on and the
+    metric has a table (every table has dimensions).
+    """
+    return get_settings().drivers_enabled and intent.get("metric") in METRIC_SOURCES
+
+
+async def run_attribution(intent: dict) -> dict:
+    """
+    Attribute the change from the previous period to products/categories.
+
+    Returns {"drivers": {dimension: attribute_change(...)}, "previous_value":
+    previous window total}. Only call it when attribution_enabled(intent).
+    Results share the run_query result cache.
+    """
+    metric = intent["metric"]
+    table, column = METRIC_SOURCES[metric]
+    time_range = intent.get("time_range")
+    current, previous = resolve_window(time_range), previous_window(time_range)
+    key = (table, *current, metric, "drivers")
+
+    return await get_result_cache().get_or_load(
+        key,
+        result_ttl(time_range),
+        partial(_execute_attribution, table, column, current, previous),
+    )
+
+
+async def run_comparison(intent: dict) -> dict:
+    """
+    Fetch the current window and the driver attribution concurrently.
+
+    The previous period's total falls out of the attribution's grouped
+    totals; it is only queried on its own when drivers are off.
+    """
+    if attribution_enabled(intent):
+        current, attribution = await asyncio.gather(run_query(intent), run_attribution(intent))
+        return {**current, **attribution}
+
+    current, previous = await asyncio.gather(
+        run_query(intent),
+        run_query({**intent, "breakdown": "none"}, window=previous_window(intent.get("time_range"))),
+    )
+    return {**current, "previous_value": previous.get("value", 0), "drivers": {}}
+
+
+def fetch_plan(intent: dict) -> tuple:
+    """
+    The data an intent needs. Two intents with the same plan can share a fetch.
+    """
+    wants_why = intent.get("comparison") == "previous_period" or intent.get("why_analysis") is True
+    return (intent.get("metric"), intent.get("time_range"), intent.get("breakdown"), wants_why)
+
+
+async def fetch_data(intent: dict) -> dict:
+    """
+    Run the Supabase queries described by fetch_plan().
+    """
+    _, _, _, wants_why = fetch_plan(intent)
+
+    # Previous period is fetched in parallel when a comparison is needed
+    if wants_why:
+        return await run_comparison(intent)
+    return await run_query(intent)
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache, partial
+from typing import Awaitable, Callable, Hashable
+
+from app.core.settings import get_settings
+
+
+class ResultCache:
+    """
+    Single-flight loader with a small TTL + LRU cache of results.
+
+    Concurrent callers for the same key share one in-flight load; finished
+    results are kept for a per-call TTL. Keys are tuples whose first item
+    is the table name, so invalidate(table) can drop them.
+    """
+
+    def __init__(self, max_size: int = 256, max_rows: int = 1000):
+        self.max_size = max_size
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[Hashable, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # Loads invalidated while running; their results are not cached
+        self._stale: set[asyncio.Task] = set()
+
+    async def get_or_load(self, key: tuple, ttl: float, loader: Callable[[], Awaitable[dict]]) -> dict:
+        """
+        Return a cached result, join an in-flight load, or start a new one.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(loader())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._finish, key, ttl))
+
+        # Shield so one caller's cancellation doesn't cancel the shared load
+        return await asyncio.shield(task)
+
+    def invalidate(self, table: str | None = None) -> None:
+        """
+        Drop cached results for a table, or everything when table is None.
+        In-flight loads are left to finish but won't be cached.
+        """
+        if table is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == table]:
+                del self._entries[key]
+        for key in list(self._inflight):
+            if table is None or key[0] == table:
+                self._stale.add(self._inflight.pop(key))
+
+    def stats(self) -> dict:
+        """
+        Hit/miss/coalesced counters and current size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+        }
+
+    def _finish(self, key: Hashable, ttl: float, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task in self._stale:
+            self._stale.discard(task)
+            return
+
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if self.max_size <= 0 or ttl <= 0 or len(result.get("rows", [])) > self.max_rows:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache:
+    """
+    Process-wide result cache configured from settings.
+    """
+    settings = get_settings()
+    return ResultCache(max_size=settings.result_cache_size, max_rows=settings.result_cache_max_rows)
+
+
+def result_ttl(time_range: str | None) -> float:
+    """
+    Cache TTL for a time range: today's numbers move, last month's don't.
+    """
+    settings = get_settings()
+    return {
+        "today": settings.result_ttl_today,
+        "last_7_days": settings.result_ttl_last_7_days,
+        "last_month": settings.result_ttl_last_month,
+    }.get(time_range, settings.result_ttl_today)
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+
+from app.core.log import log_event
+from app.core.settings import get_settings
+from .result_cache import get_result_cache
+from .supabase import supabase_request
+
+
+logger = logging.getLogger(__name__)
+
+# table -> column that is summed, and the dimensions rolled up per day
+ROLLUP_SOURCES = {
+    "sales": {"value": "revenue", "dimensions": ("product", "category")},
+    "expenses": {"value": "amount", "dimensions": ("category",)},
+}
+
+# Dimension used for whole-day totals
+ALL = "all"
+
+
+class RollupStore:
+    """
+    Local SQLite store of per-day totals for `sales` and `expenses`.
+
+    Each source row is folded into (day, dimension, key) buckets holding a
+    row count and a summed value. Sync is incremental on the `id` column,
+    so source tables are assumed to be append-only.
+    """
+
+    def __init__(self, path: str):
+        # Page writes and reads both run on worker threads (asyncio.to_thread).
+        # Reads use their own connection and, in WAL mode, never wait on a
+        # write in progress; ":memory:" has one connection, so they share a lock
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rollups (
+                source TEXT NOT NULL,
+                day TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                PRIMARY KEY (source, dimension, day, key)
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                source TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL,
+                synced_at REAL NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+        self._reader = self._db if path == ":memory:" else sqlite3.connect(path, check_same_thread=False)
+        if self._reader is self._db:
+            self._read_lock = self._write_lock
+
+        # In-memory copy of sync_state so watermark()/is_fresh() never touch SQLite
+        self._state: dict[str, tuple[int, float]] = {
+            source: (last_id, synced_at)
+            for source, last_id, synced_at in self._db.execute("SELECT source, last_id, synced_at FROM sync_state")
+        }
+
+    def watermark(self, source: str) -> tuple[int, float]:
+        """
+        (last synced id, unix time of last completed sync) for a source.
+        """
+        return self._state.get(source, (0, 0.0))
+
+    def is_fresh(self, source: str, max_age: float) -> bool:
+        """
+        True if a sync of the source completed within `max_age` seconds.
+        """
+        _, synced_at = self.watermark(source)
+        return time.time() - synced_at <= max_age
+
+    def apply(self, source: str, rows: list[dict], last_id: int) -> None:
+        """
+        Fold a page of source rows into the rollups and advance the id
+        watermark. The sync time is left alone until mark_synced(), so a
+        half-finished sync never looks fresh.
+        """
+        spec = ROLLUP_SOURCES[source]
+        value_column = spec["value"]
+
+        buckets: dict[tuple[str, str, str], list] = {}
+        for row in rows:
+            day = str(row.get("date", ""))[:10]
+            value = row.get(value_column) or 0
+            keys = [(ALL, "")] + [(dim, str(row.get(dim) or "")) for dim in spec["dimensions"]]
+            for dimension, key in keys:
+                bucket = buckets.setdefault((day, dimension, key), [0, 0.0])
+                bucket[0] += 1
+                bucket[1] += value
+
+        with self._write_lock:
+            self._db.executemany(
+                "INSERT INTO rollups (source, day, dimension, key, row_count, total) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, dimension, day, key) DO UPDATE SET "
+                "row_count = row_count + excluded.row_count, total = total + excluded.total",
+                [(source, day, dim, key, count, total) for (day, dim, key), (count, total) in buckets.items()],
+            )
+            self._db.execute(
+                "INSERT INTO sync_state (source, last_id, synced_at) VALUES (?, ?, 0) "
+                "ON CONFLICT (source) DO UPDATE SET last_id = excluded.last_id",
+                (source, last_id),
+            )
+            self._db.commit()
+        self._state[source] = (last_id, self.watermark(source)[1])
+
+    def mark_synced(self, source: str) -> None:
+        """
+        Record that a sync caught up with the source (it saw a short or
+        empty page).
+        """
+        last_id, _ = self.watermark(source)
+        synced_at = time.time()
+        with self._write_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (source, last_id, synced_at) VALUES (?, ?, ?)",
+                (source, last_id, synced_at),
+            )
+            self._db.commit()
+        self._state[source] = (last_id, synced_at)
+
+    def totals(self, source: str, start: date, end: date) -> tuple[int, float]:
+        """
+        (row count, summed value) over [start, end). Blocking; call it
+        through asyncio.to_thread.
+        """
+        with self._read_lock:
+            count, total = self._reader.execute(
+                "SELECT COALESCE(SUM(row_count), 0), COALESCE(SUM(total), 0) FROM rollups "
+                "WHERE source = ? AND dimension = ? AND day >= ? AND day < ?",
+                (source, ALL, start.isoformat(), end.isoformat()),
+            ).fetchone()
+        return count, total
+
+    def group_totals(self, source: str, dimension: str, start: date, end: date) -> list[tuple[str, int, float]]:
+        """
+        (key, row count, summed value) per dimension key over [start, end).
+        Blocking; call it through asyncio.to_thread.
+        """
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT key, SUM(row_count), SUM(total) FROM rollups "
+                "WHERE source = ? AND dimension = ? AND day >= ? AND day < ? GROUP BY key",
+                (source, dimension, start.isoformat(), end.isoformat()),
+            ).fetchall()
+
+
+@lru_cache(maxsize=1)
+def get_rollup_store() -> RollupStore | None:
+    """
+    Process-wide rollup store, or None when ROLLUP_PATH is not set.
+    """
+    path = get_settings().rollup_path
+    return RollupStore(path) if path else None
+
+
+async def sync_source(store: RollupStore, source: str) -> int:
+    """
+    Pull rows newer than the watermark page by page. Returns rows applied.
+
+    The source is marked synced only once a short or empty page shows the
+    sync has caught up.
+    """
+    settings = get_settings()
+    spec = ROLLUP_SOURCES[source]
+    columns = ",".join(["id", "date", spec["value"], *spec["dimensions"]])
+
+    applied = 0
+    last_id, _ = store.watermark(source)
+    while True:
+        response = await supabase_request(
+            source,
+            {
+                "select": columns,
+                "id": f"gt.{last_id}",
+                "order": "id.asc",
+                "limit": str(settings.rollup_page_size),
+            },
+        )
+        response.raise_for_status()
+        rows = response.json()
+        if not rows:
+            break
+
+        last_id = max(int(r["id"]) for r in rows)
+        await asyncio.to_thread(store.apply, source, rows, last_id)
+        applied += len(rows)
+
+        if len(rows) < settings.rollup_page_size:
+            break
+
+    await asyncio.to_thread(store.mark_synced, source)
+    return applied
+
+
+_sync_lock = asyncio.Lock()
+
+
+async def sync_rollups() -> dict:
+    """
+    Sync every source on demand. Concurrent callers share one run.
+    """
+    store = get_rollup_store()
+    if store is None:
+        return {}
+
+    if _sync_lock.locked():
+        async with _sync_lock:
+            return {}
+
+    async with _sync_lock:
+        applied = {source: await sync_source(store, source) for source in ROLLUP_SOURCES}
+
+    # Cached query results for tables with new rows are now stale
+    cache = get_result_cache()
+    for source, count in applied.items():
+        if count:
+            cache.invalidate(source)
+    return applied
+
+
+async def sync_forever() -> None:
+    """
+    Background loop started from the lifespan when rollups are enabled.
+    """
+    interval = get_settings().rollup_sync_interval
+    while True:
+        try:
+            await sync_rollups()
+        except Exception as exc:
+            log_event(logger, "rollup_sync_failed", logging.WARNING, error=str(exc))
+        await asyncio.sleep(interval)
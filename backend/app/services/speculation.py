@@ -0,0 +1,72 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+from app.core.settings import get_settings
+from .intent_extractor import fallback_intent
+from .intent_validator import extract_validated_intent, resolve_local_intent
+
+
+_speculation_counts = {"started": 0, "hits": 0, "misses": 0}
+
+
+def _discard(task: asyncio.Task) -> None:
+    """
+    Cancel a speculative fetch we no longer need, swallowing its outcome.
+    """
+    if task.done():
+        if not task.cancelled():
+            task.exception()
+        return
+    task.cancel()
+
+
+async def resolve_with_prefetch(
+    question: str,
+    plan: Callable[[dict], Hashable],
+    fetch: Callable[[dict], Awaitable[dict]],
+) -> tuple[dict, asyncio.Task | None]:
+    """
+    Resolve the question's intent while speculatively fetching its data.
+
+    If the intent can't be resolved locally, the rule-based guess (if any)
+    starts `fetch(guess)` at the same time as the LLM call. When the
+    validated intent has the same `plan(...)` as the guess, the running
+    fetch is returned for the caller to await; otherwise it is cancelled.
+
+    Returns:
+        (intent, task or None)
+    """
+    local = resolve_local_intent(question)
+    if local is not None:
+        return local, None
+
+    guess = fallback_intent(question) if get_settings().speculation_enabled else None
+    task = None
+    if guess is not None:
+        _speculation_counts["started"] += 1
+        task = asyncio.create_task(fetch(guess))
+
+    try:
+        intent = await extract_validated_intent(question)
+    except BaseException:
+        if task is not None:
+            _discard(task)
+        raise
+
+    if task is None:
+        return intent, None
+
+    if intent.get("clarification_required") is not True and plan(intent) == plan(guess):
+        _speculation_counts["hits"] += 1
+        return intent, task
+
+    _speculation_counts["misses"] += 1
+    _discard(task)
+    return intent, None
+
+
+def speculation_stats() -> dict:
+    """
+    Speculative fetches started, used (hits) and thrown away (misses).
+    """
+    return dict(_speculation_counts)
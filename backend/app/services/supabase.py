@@ -0,0 +1,53 @@
+import httpx
+
+from app.core.clients import get_http_client
+from app.core.metrics import SUPABASE_BYTES, SUPABASE_CALLS, stage
+from app.core.settings import get_settings
+
+
+def table_url(table: str) -> str:
+    """
+    PostgREST URL for a Supabase table.
+    """
+    supabase_url = get_settings().supabase_url
+
+    if not supabase_url.startswith("http"):
+        raise RuntimeError("SUPABASE_URL is invalid or missing protocol")
+
+    # ✅ SAFE URL BUILD
+    return f"{supabase_url}/rest/v1/{table}"
+
+
+def auth_headers() -> dict:
+    """
+    apikey/Authorization headers for the anon key.
+    """
+    anon_key = get_settings().supabase_anon_key
+
+    if not anon_key:
+        raise RuntimeError("SUPABASE_ANON_KEY is missing")
+
+    return {
+        "apikey": anon_key,
+        "Authorization": f"Bearer {anon_key}",
+    }
+
+
+async def supabase_request(
+    table: str, params: list | dict, method: str = "GET", headers: dict | None = None
+) -> httpx.Response:
+    """
+    Send a PostgREST request over the shared client, timed as a
+    "supabase" stage and counted with the bytes received.
+    """
+    client = get_http_client()
+    request_headers = {**auth_headers(), **(headers or {})}
+
+    with stage("supabase") as timing:
+        response = await client.request(method, table_url(table), headers=request_headers, params=params)
+        size = len(response.content)
+        timing["desc"] = f"{table} {size}B"
+
+    SUPABASE_CALLS.inc(table=table, status=response.status_code)
+    SUPABASE_BYTES.inc(size, table=table)
+    return response
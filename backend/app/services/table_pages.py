@@ -0,0 +1,139 @@
+import base64
+import json
+from datetime import date
+from typing import AsyncIterator
+
+from app.core.settings import get_settings
+from .query_engine import METRIC_SOURCES, resolve_window
+from .supabase import supabase_request
+
+
+# Keyset pagination order; (date, id) is unique and stable
+PAGE_ORDER = "date.asc,id.asc"
+
+# Columns a table page may select
+TABLE_COLUMNS = {
+    "sales": ("id", "date", "revenue", "product", "category"),
+    "expenses": ("id", "date", "amount", "category"),
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor can't be decoded."""
+
+
+class InvalidColumns(ValueError):
+    """Raised when requested columns don't exist on the metric's table."""
+
+
+def check_columns(intent: dict, columns: list[str] | None) -> None:
+    """
+    Reject columns the metric's table doesn't have, before PostgREST does.
+
+    Raises:
+        InvalidColumns: Listing the unknown and the allowed columns
+    """
+    metric = intent.get("metric")
+    if not columns or metric not in METRIC_SOURCES:
+        return
+    allowed = TABLE_COLUMNS[METRIC_SOURCES[metric][0]]
+    unknown = [c for c in columns if c not in allowed]
+    if unknown:
+        raise InvalidColumns(f"Unknown columns {', '.join(unknown)}; choose from {', '.join(allowed)}")
+
+
+def page_source(intent: dict) -> tuple[str, date, date] | None:
+    """
+    (table, start, end) the intent's detail rows come from, or None for an
+    unknown metric. Intents with the same source have the same pages.
+    """
+    metric = intent.get("metric")
+    if metric not in METRIC_SOURCES:
+        return None
+    return (METRIC_SOURCES[metric][0], *resolve_window(intent.get("time_range")))
+
+
+def encode_cursor(row: dict) -> str:
+    """
+    Opaque cursor pointing just after `row` in PAGE_ORDER.
+    """
+    raw = json.dumps([row["date"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """
+    Inverse of encode_cursor(). Both parts are re-serialized from parsed
+    values (an ISO date and an int) before they go into a filter, so a
+    forged cursor can't alter the PostgREST logic tree.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        day, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(day, str) or not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise TypeError("Cursor must hold a date string and an integer id")
+        return date.fromisoformat(day).isoformat(), row_id
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+async def fetch_table_page(
+    intent: dict, columns: list[str] | None = None, page_size: int = 50, cursor: str | None = None
+) -> dict:
+    """
+    Fetch one page of detail rows for an intent's window.
+
+    Only `columns` (plus the date/id keyset columns) are selected, and at
+    most page_size + 1 rows are read to learn whether another page exists.
+
+    Returns:
+        dict: {"rows": [...], "next_cursor": str | None}
+
+    Raises:
+        InvalidColumns: If a column isn't on the metric's table
+        InvalidCursor: If the cursor is malformed
+    """
+    source = page_source(intent)
+    if source is None:
+        return {"rows": [], "next_cursor": None}
+    check_columns(intent, columns)
+
+    table, start_date, end_date = source
+    page_size = max(1, min(page_size, get_settings().table_page_max))
+
+    select = ",".join(dict.fromkeys(["date", "id", *columns])) if columns else "*"
+    params = [
+        ("date", f"gte.{start_date.isoformat()}"),
+        ("date", f"lt.{end_date.isoformat()}"),
+        ("select", select),
+        ("order", PAGE_ORDER),
+        ("limit", str(page_size + 1)),
+    ]
+    if cursor:
+        day, row_id = decode_cursor(cursor)
+        params.append(("or", f"(date.gt.{day},and(date.eq.{day},id.gt.{row_id}))"))
+
+    response = await supabase_request(table, params)
+    response.raise_for_status()
+    rows = response.json()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return {"rows": rows, "next_cursor": encode_cursor(rows[-1]) if has_more else None}
+
+
+async def stream_table(intent: dict, columns: list[str] | None = None, page_size: int = 500) -> AsyncIterator[dict]:
+    """
+    Yield every detail row in the window, one bounded page at a time.
+    """
+    cursor = None
+    while True:
+        page = await fetch_table_page(intent, columns, page_size, cursor)
+        for row in page["rows"]:
+            yield row
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
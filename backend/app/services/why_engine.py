@@ -26,3 +26,92 @@ def analyze_change(current: float, previous: float, metric: str) -> dict:
         "direction": direction,
         "reason": reason
     }
+
+
+def attribute_change(groups: list, current: list, previous: list, by: str, top_n: int = 5) -> dict:
+    """
+    Attribute the change between two periods to the keys of one dimension.
+
+    Each key's change splits into a volume effect (its previous value
+    growing at the overall rate) and a mix effect (what's left: the key
+    gaining or losing share):
+
+        volume_i = previous_i * (T_current / T_previous - 1)
+        mix_i    = current_i - previous_i * T_current / T_previous
+
+    Args:
+        groups: Keys of the dimension (product/category)
+        current: Current-period total per key
+        previous: Previous-period total per key
+        by: Dimension name
+        top_n: Contributors to report
+
+    Returns:
+        dict: Total change, top contributors by absolute change, and the
+        keys that are new this period or had nothing this period
+    """
+    total_current = sum(current)
+    total_previous = sum(previous)
+    total_change = total_current - total_previous
+    growth = total_current / total_previous if total_previous else None
+
+    items = []
+    for key, cur, prev in zip(groups, current, previous):
+        name = str(key) if key not in ("", None) else "unknown"
+        change = cur - prev
+        volume = prev * (growth - 1) if growth is not None else cur
+        items.append({
+            by: name,
+            "current": round(cur, 2),
+            "previous": round(prev, 2),
+            "change": round(change, 2),
+            "share_of_change": round(change / total_change * 100, 2) if total_change else 0,
+            "volume_effect": round(volume, 2),
+            "mix_effect": round(change - volume, 2),
+            "status": "new" if prev == 0 and cur else "lost" if cur == 0 and prev else "existing",
+        })
+
+    items.sort(key=lambda item: (-abs(item["change"]), item[by]))
+    return {
+        "by": by,
+        "total_change": round(total_change, 2),
+        "top_contributors": items[:top_n],
+        "new": [item[by] for item in items if item["status"] == "new"],
+        "lost": [item[by] for item in items if item["status"] == "lost"],
+    }
+
+
+def driver_reasons(drivers: dict, metric: str, limit: int = 3) -> list[dict]:
+    """
+    One-line explanations for the largest contributors across dimensions.
+    """
+    contributors = [
+        (attribution["by"], item)
+        for attribution in drivers.values()
+        for item in attribution["top_contributors"]
+        if item["change"]
+    ]
+    contributors.sort(key=lambda pair: -abs(pair[1]["change"]))
+
+    reasons = []
+    for by, item in contributors[:limit]:
+        direction = "up" if item["change"] > 0 else "down"
+        verb = "added" if item["change"] > 0 else "took away"
+        reason = (
+            f"{by.capitalize()} '{item[by]}' {verb} {abs(item['change'])} "
+            f"({abs(item['share_of_change'])}% of the change in {metric})"
+        )
+        if item["status"] == "new":
+            reason += "; it is new this period"
+        elif item["status"] == "lost":
+            reason += "; it had nothing this period"
+        elif abs(item["mix_effect"]) > abs(item["volume_effect"]):
+            reason += "; mostly a shift in mix"
+        reasons.append({
+            "dimension": by,
+            "key": item[by],
+            "change": item["change"],
+            "direction": direction,
+            "reason": reason + ".",
+        })
+    return reasons
@@ -0,0 +1,87 @@
+"""
+Benchmark the breakdown engine on synthetic sales rows.
+
+Usage (from backend/):
+    python -m bench.bench_breakdown [--rows 100000] [--products 500] [--repeat 5]
+
+Reports the best and median time for compute_breakdown (pivot + group + top-N),
+for group_sum alone and for driver attribution over two periods of --rows
+each (merge_periods + attribute_change), with and without NumPy. Attribution
+merges in pure Python either way, so its two rows are a control.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services import breakdown_engine
+from app.services.breakdown_engine import compute_breakdown
+from app.services.why_engine import attribute_change
+
+
+def synthetic_rows(n: int, products: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "date": f"2026-09-{1 + i % 30:02d}",
+            "product": f"product-{rng.randrange(products)}",
+            "category": f"category-{rng.randrange(max(products // 20, 1))}",
+            "revenue": round(rng.uniform(10, 2000), 2),
+        }
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, args.products)
+    keys = [r["product"] for r in rows]
+    values = [r["revenue"] for r in rows]
+    previous = synthetic_rows(args.rows, args.products, seed=8)
+    previous_keys = [r["product"] for r in previous]
+    previous_values = [r["revenue"] for r in previous]
+
+    def attribution():
+        groups, current_totals, previous_totals = breakdown_engine.merge_periods(
+            keys, values, previous_keys, previous_values
+        )
+        return attribute_change(groups, current_totals, previous_totals, "product")
+
+    engines = [("python", None)]
+    if breakdown_engine.np is not None:
+        engines.insert(0, ("numpy", breakdown_engine.np))
+
+    print(f"rows={args.rows} products={args.products} repeat={args.repeat}")
+    for name, np_module in engines:
+        saved = breakdown_engine.np
+        breakdown_engine.np = np_module
+        try:
+            full = timed(lambda: compute_breakdown(rows, "product", "revenue"), args.repeat)
+            group = timed(lambda: breakdown_engine.group_sum(keys, values), args.repeat)
+            drivers = timed(attribution, args.repeat)
+        finally:
+            breakdown_engine.np = saved
+        print(
+            f"{name:7s} compute_breakdown best={min(full):7.1f}ms median={statistics.median(full):7.1f}ms | "
+            f"group_sum best={min(group):7.1f}ms median={statistics.median(group):7.1f}ms | "
+            f"attribution best={min(drivers):7.1f}ms median={statistics.median(drivers):7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Evaluate the rule-based intent parser against the labelled corpus.
+
+Usage (from backend/):
+    python -m bench.eval_intent_parser [--threshold 0.85] [--verbose]
+
+`expected: null` marks questions that should be left to the LLM.
+Reports accuracy of fast-path answers and the share of traffic that
+would skip the LLM.
+"""
+import argparse
+import json
+from pathlib import Path
+
+from app.services.intent_parser import parse_intent
+
+
+CORPUS = Path(__file__).with_name("intent_corpus.jsonl")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--corpus", type=Path, default=CORPUS)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    cases = [json.loads(line) for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    skipped = correct_skipped = 0
+    correct_overall = 0
+    for case in cases:
+        result = parse_intent(case["question"])
+        fast = result.intent is not None and result.confidence >= args.threshold
+        expected = case["expected"]
+
+        if fast:
+            skipped += 1
+            ok = result.intent == expected
+            correct_skipped += ok
+        else:
+            # Deferring to the LLM is the right call only when no confident parse was expected
+            ok = expected is None
+        correct_overall += ok
+
+        if args.verbose or not ok:
+            mark = "ok  " if ok else "FAIL"
+            route = "fast" if fast else "llm "
+            print(f"{mark} {route} {result.confidence:.2f} {case['question']!r} -> {result.intent}")
+
+    total = len(cases)
+    print()
+    print(f"cases:              {total}")
+    print(f"skip LLM share:     {skipped / total:.1%} ({skipped}/{total})")
+    print(f"fast-path accuracy: {correct_skipped / skipped:.1%}" if skipped else "fast-path accuracy: n/a")
+    print(f"routing accuracy:   {correct_overall / total:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Local stand-in for the Groq chat completions API.
+
+Usage (from backend/):
+    python -m bench.fake_groq --port 54322 --latency-ms 300 --jitter-ms 100 --malformed-rate 0.1 \
+        [--slow-rate 0.05 --slow-ms 4000]
+
+Answers POST /openai/v1/chat/completions in the OpenAI/Groq response shape.
+The "model" is the rule-based parser, so intents are realistic; a
+configurable share of answers is malformed JSON to exercise the retry path,
+and another share stalls for --slow-ms to exercise timeouts and hedging.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+from app.services.intent_parser import parse_intent
+
+
+def create_app(
+    latency_ms: float,
+    jitter_ms: float,
+    malformed_rate: float,
+    slow_rate: float = 0.0,
+    slow_ms: float = 0.0,
+    seed_value: int = 7,
+) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed_value)
+    stats = {"requests": 0, "malformed": 0, "slow": 0}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        question = next((m["content"] for m in reversed(body["messages"]) if m["role"] == "user"), "")
+
+        delay = max(latency_ms + rng.uniform(-jitter_ms, jitter_ms), 0)
+        if rng.random() < slow_rate:
+            stats["slow"] += 1
+            delay = slow_ms
+        await asyncio.sleep(delay / 1000)
+
+        stats["requests"] += 1
+        intent = parse_intent(question).intent or {"clarification_required": True}
+        content = json.dumps(intent)
+        if rng.random() < malformed_rate:
+            stats["malformed"] += 1
+            content = "Sure! Here is the intent: " + content[: len(content) // 2]
+
+        return {
+            "id": f"chatcmpl-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=54322)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of answers delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.malformed_rate, args.slow_rate, args.slow_ms)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Local PostgREST-compatible stand-in for Supabase, backed by SQLite.
+
+Usage (from backend/):
+    python -m bench.fake_postgrest --rows 100000 --port 54321 [--no-aggregates]
+
+Serves GET/HEAD /rest/v1/{sales,expenses} with the subset of PostgREST the
+backend uses: column filters (eq/neq/gt/gte/lt/lte), or=(...) / and(...)
+logic trees, select projection,
+aggregate selects (col.sum(), count(), alias:col.sum()) with implicit GROUP BY, order,
+limit/offset and `Prefer: count=exact`.
+"""
+import argparse
+import json
+import random
+import re
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+TABLES = {
+    "sales": ("id", "date", "revenue", "product", "category"),
+    "expenses": ("id", "date", "amount", "category"),
+}
+OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+RESERVED = {"select", "order", "limit", "offset"}
+LOGIC = {"or": " OR ", "and": " AND "}
+_AGGREGATE = re.compile(r"^(?:(\w+):)?(?:(\w+)\.)?(sum|count)\(\)$")
+
+
+def create_schema(db: sqlite3.Connection) -> None:
+    """
+    Create empty `sales` and `expenses` tables.
+    """
+    db.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, date TEXT, revenue REAL, product TEXT, category TEXT)")
+    db.execute("CREATE TABLE expenses (id INTEGER PRIMARY KEY, date TEXT, amount REAL, category TEXT)")
+
+
+def seed(db: sqlite3.Connection, rows: int, days: int = 120, seed_value: int = 42) -> None:
+    """
+    Fill `sales` with `rows` rows and `expenses` with a quarter as many,
+    spread over the last `days` days.
+    """
+    rng = random.Random(seed_value)
+    today = date.today()
+    products = [f"product-{i}" for i in range(200)]
+    categories = [f"category-{i}" for i in range(20)]
+
+    create_schema(db)
+    db.executemany(
+        "INSERT INTO sales VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                i + 1,
+                (today - timedelta(days=rng.randrange(days))).isoformat(),
+                round(rng.uniform(20, 2500), 2),
+                rng.choice(products),
+                rng.choice(categories),
+            )
+            for i in range(rows)
+        ),
+    )
+    db.executemany(
+        "INSERT INTO expenses VALUES (?, ?, ?, ?)",
+        (
+            (
+                i + 1,
+                (today - timedelta(days=rng.randrange(days))).isoformat(),
+                round(rng.uniform(50, 5000), 2),
+                rng.choice(categories),
+            )
+            for i in range(max(rows // 4, 1))
+        ),
+    )
+    db.execute("CREATE INDEX sales_date ON sales (date)")
+    db.execute("CREATE INDEX expenses_date ON expenses (date)")
+    db.commit()
+
+
+class QueryError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.body = json.dumps({"code": code, "message": message})
+
+
+def _column(table: str, name: str) -> str:
+    if name not in TABLES[table]:
+        raise QueryError(400, "PGRST100", f"column {table}.{name} does not exist")
+    return name
+
+
+def _condition(table: str, column: str, expression: str, args: list) -> str:
+    op, _, value = expression.partition(".")
+    if op not in OPERATORS:
+        raise QueryError(400, "PGRST100", f"unsupported operator {op!r}")
+    args.append(value)
+    return f"{_column(table, column)} {OPERATORS[op]} ?"
+
+
+def _split_top_level(expression: str) -> list[str]:
+    parts, depth, current = [], 0, ""
+    for char in expression:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += (char == "(") - (char == ")")
+        current += char
+    return parts + [current] if current else parts
+
+
+def _logic(table: str, joiner: str, expression: str, args: list) -> str:
+    """
+    Translate a logic tree like (date.gt.X,and(date.eq.X,id.gt.5)) into SQL.
+    """
+    if not (expression.startswith("(") and expression.endswith(")")):
+        raise QueryError(400, "PGRST100", f"malformed logic tree {expression!r}")
+    terms = []
+    for part in _split_top_level(expression[1:-1]):
+        head, paren, rest = part.partition("(")
+        if paren and head in LOGIC:
+            terms.append(_logic(table, LOGIC[head], "(" + rest, args))
+        else:
+            column, _, condition = part.partition(".")
+            terms.append(_condition(table, column, condition, args))
+    return "(" + joiner.join(terms) + ")"
+
+
+def build_query(table: str, params: list[tuple[str, str]], aggregates: bool) -> tuple[str, str, list]:
+    """
+    Translate PostgREST query params into (select SQL, count SQL, args).
+    """
+    where, args = [], []
+    select, order, limit, offset = "*", "", None, None
+
+    for key, value in params:
+        if key == "select":
+            select = value
+        elif key == "order":
+            order = value
+        elif key == "limit":
+            limit = int(value)
+        elif key == "offset":
+            offset = int(value)
+        elif key in LOGIC:
+            where.append(_logic(table, LOGIC[key], value, args))
+        elif key not in RESERVED:
+            where.append(_condition(table, key, value, args))
+
+    fields, group_by, has_aggregate = [], [], False
+    for item in filter(None, (part.strip() for part in select.split(","))):
+        match = _AGGREGATE.match(item)
+        if match:
+            if not aggregates:
+                raise QueryError(400, "PGRST123", "Use of aggregate functions is not allowed")
+            alias, column, func = match.groups()
+            has_aggregate = True
+            if alias and not alias.isidentifier():
+                raise QueryError(400, "PGRST100", f"invalid alias {alias!r}")
+            if func == "count":
+                fields.append(f"COUNT(*) AS {alias or 'count'}")
+            else:
+                fields.append(f"SUM({_column(table, column)}) AS {alias or 'sum'}")
+        elif item == "*":
+            fields.append("*")
+        else:
+            fields.append(_column(table, item))
+            group_by.append(item)
+
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+    sql = f"SELECT {', '.join(fields)} FROM {table}{where_sql}"
+    if has_aggregate and group_by:
+        sql += f" GROUP BY {', '.join(group_by)}"
+    if order:
+        terms = []
+        for term in order.split(","):
+            column, _, direction = term.partition(".")
+            terms.append(f"{_column(table, column)} {'DESC' if direction == 'desc' else 'ASC'}")
+        sql += f" ORDER BY {', '.join(terms)}"
+    if limit is not None:
+        sql += f" LIMIT {limit}"
+        if offset:
+            sql += f" OFFSET {offset}"
+
+    count_sql = f"SELECT COUNT(*) FROM {table}{where_sql}"
+    return sql, count_sql, args
+
+
+def create_app(db: sqlite3.Connection, aggregates: bool = True) -> FastAPI:
+    app = FastAPI()
+    db.row_factory = sqlite3.Row
+    lock = threading.Lock()
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "HEAD"])
+    def read_table(table: str, request: Request):
+        if table not in TABLES:
+            return Response(status_code=404, content=json.dumps({"code": "42P01"}), media_type="application/json")
+
+        try:
+            sql, count_sql, args = build_query(table, list(request.query_params.multi_items()), aggregates)
+        except QueryError as exc:
+            return Response(status_code=exc.status, content=exc.body, media_type="application/json")
+
+        headers = {}
+        wants_count = "count=exact" in request.headers.get("prefer", "")
+        with lock:
+            rows = [] if request.method == "HEAD" else [dict(r) for r in db.execute(sql, args)]
+            total = db.execute(count_sql, args).fetchone()[0] if wants_count else None
+        if total is not None:
+            headers["Content-Range"] = f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"
+
+        body = "" if request.method == "HEAD" else json.dumps(rows)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--no-aggregates", action="store_true", help="reject aggregate selects like older PostgREST")
+    args = parser.parse_args()
+
+    db = sqlite3.connect(":memory:", check_same_thread=False)
+    seed(db, args.rows)
+    uvicorn.run(create_app(db, aggregates=not args.no_aggregates), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Load-test /api/query against local Groq and Supabase stand-ins.
+
+Usage (from backend/):
+    python -m bench.run_bench                       # default scenarios, compare to baseline
+    python -m bench.run_bench --scenario llm_retry_1k --scenario table_100k
+    python -m bench.run_bench --all                 # include the 1M-row scenario
+    python -m bench.run_bench --save-baseline       # record results as the new baseline
+
+Each scenario starts bench.fake_postgrest (seeded with N synthetic rows),
+bench.fake_groq and the API under uvicorn as subprocesses, drives
+/api/query at a fixed concurrency and reports throughput, p50/p95/p99
+latency, the API process's peak RSS and speculative prefetch hits/started
+(from /metrics). Runs fully offline on Linux.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+
+BACKEND = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).with_name("baseline.json")
+
+FAST_QUESTIONS = [
+    "revenue last week",
+    "How many sales did I make today?",
+    "expenses last month",
+    "What was my revenue today?",
+    "sales last month",
+]
+# Wordy questions. The parser still handles them confidently, so scenarios
+# meant to reach Groq switch the fast path off
+AMBIGUOUS_QUESTIONS = [
+    "how did the shop earn recently, last 7 days revenue please",
+    "expenses for the past week roughly, a summary",
+]
+WHY_QUESTIONS = [
+    "Why did revenue drop last week?",
+    "expenses growth last month",
+]
+BREAKDOWN_QUESTIONS = [
+    "revenue last month by product",
+    "sales by category today",
+    "expenses last month category wise",
+]
+
+# LLM-only path: no cache, no fast path, no speculation
+LLM_ONLY = {"FAST_PATH_ENABLED": "false", "INTENT_CACHE_SIZE": "0", "SPECULATION_ENABLED": "false"}
+
+SCENARIOS = {
+    "fast_path_1k": {"rows": 1_000, "questions": FAST_QUESTIONS},
+    "llm_retry_1k": {
+        "rows": 1_000,
+        "questions": FAST_QUESTIONS + AMBIGUOUS_QUESTIONS,
+        "env": LLM_ONLY,
+        "groq": {"latency_ms": 200, "jitter_ms": 50, "malformed_rate": 0.2},
+        "requests": 200,
+    },
+    "llm_tail_1k": {
+        "rows": 1_000,
+        "questions": FAST_QUESTIONS + AMBIGUOUS_QUESTIONS,
+        "env": {**LLM_ONLY, "LLM_HEDGING": "true"},
+        "groq": {"latency_ms": 200, "jitter_ms": 50, "malformed_rate": 0.05, "slow_rate": 0.1, "slow_ms": 5000},
+        "requests": 200,
+    },
+    "speculative_1k": {
+        "rows": 1_000,
+        "questions": AMBIGUOUS_QUESTIONS,
+        # Every question goes to Groq while the parser's guess is prefetched
+        "env": {"INTENT_CACHE_SIZE": "0", "FAST_PATH_ENABLED": "false"},
+        "groq": {"latency_ms": 200, "jitter_ms": 50, "malformed_rate": 0.0},
+        "requests": 200,
+    },
+    "aggregate_100k": {"rows": 100_000, "questions": FAST_QUESTIONS + WHY_QUESTIONS},
+    "breakdown_100k": {"rows": 100_000, "questions": BREAKDOWN_QUESTIONS},
+    "table_100k": {
+        "rows": 100_000,
+        "questions": FAST_QUESTIONS,
+        "include_table": True,
+        "requests": 100,
+        "concurrency": 5,
+    },
+    "aggregate_1m": {"rows": 1_000_000, "questions": FAST_QUESTIONS + WHY_QUESTIONS, "slow": True},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn(args: list[str], env: dict | None = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=BACKEND,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 180.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode} before becoming ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def peak_rss_mb(pid: int) -> float:
+    """
+    Peak resident set size (VmHWM) of a process, from /proc.
+    """
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def drive(base_url: str, questions: list[str], requests: int, concurrency: int, include_table: bool) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    queue = iter(range(requests))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            for i in queue:
+                payload = {"question": questions[i % len(questions)], "include_table": include_table}
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/query", json=payload)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def scrape_counter(base_url: str, name: str) -> dict[str, float]:
+    """
+    Label value -> value for one counter family on the API's /metrics.
+    """
+    values = {}
+    for line in httpx.get(f"{base_url}/metrics", timeout=5.0).text.splitlines():
+        if line.startswith(name + "{"):
+            labels, _, value = line.partition("} ")
+            values[labels.partition('="')[2].rstrip('"')] = float(value)
+    return values
+
+
+def run_scenario(name: str, spec: dict, concurrency: int, requests: int | None) -> dict:
+    pg_port, groq_port, api_port = free_port(), free_port(), free_port()
+    groq = {"latency_ms": 300, "jitter_ms": 100, "malformed_rate": 0.1, "slow_rate": 0.0, "slow_ms": 0, **spec.get("groq", {})}
+
+    processes = []
+    try:
+        postgrest = spawn(["-m", "bench.fake_postgrest", "--rows", str(spec["rows"]), "--port", str(pg_port)])
+        processes.append(postgrest)
+        fake_groq = spawn([
+            "-m", "bench.fake_groq", "--port", str(groq_port),
+            "--latency-ms", str(groq["latency_ms"]),
+            "--jitter-ms", str(groq["jitter_ms"]),
+            "--malformed-rate", str(groq["malformed_rate"]),
+            "--slow-rate", str(groq["slow_rate"]),
+            "--slow-ms", str(groq["slow_ms"]),
+        ])
+        processes.append(fake_groq)
+        wait_ready(f"http://127.0.0.1:{pg_port}/rest/v1/sales?limit=1", postgrest)
+        wait_ready(f"http://127.0.0.1:{groq_port}/stats", fake_groq)
+
+        api = spawn(
+            ["-m", "uvicorn", "app.main:app", "--port", str(api_port), "--log-level", "warning"],
+            env={
+                "SUPABASE_URL": f"http://127.0.0.1:{pg_port}",
+                "SUPABASE_ANON_KEY": "bench",
+                "GROQ_API_KEY": "bench",
+                "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+                "LOG_SAMPLE_RATE": "0",
+                **spec.get("env", {}),
+            },
+        )
+        processes.append(api)
+        wait_ready(f"http://127.0.0.1:{api_port}/health", api)
+
+        api_url = f"http://127.0.0.1:{api_port}"
+        result = asyncio.run(drive(
+            api_url,
+            spec["questions"],
+            requests or spec.get("requests", 400),
+            spec.get("concurrency", concurrency),
+            spec.get("include_table", False),
+        ))
+        result["peak_rss_mb"] = round(peak_rss_mb(api.pid), 1)
+        speculation = scrape_counter(api_url, "vyapar_speculation")
+        result["speculation_hits"] = int(speculation.get("hits", 0))
+        result["speculation_started"] = int(speculation.get("started", 0))
+        result["rows"] = spec["rows"]
+        return result
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Regressions beyond `tolerance` in p95 latency or throughput.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']}/s vs baseline {base['throughput_rps']}/s"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="repeatable; default: all fast ones")
+    parser.add_argument("--all", action="store_true", help="include slow (1M-row) scenarios")
+    parser.add_argument("--concurrency", type=int, default=20, help="default for scenarios that don't set one")
+    parser.add_argument("--requests", type=int, help="override requests per scenario")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    args = parser.parse_args()
+
+    names = args.scenario or [n for n, s in SCENARIOS.items() if args.all or not s.get("slow")]
+
+    results = {}
+    header = (
+        f"{'scenario':16s} {'rows':>9s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} "
+        f"{'rss MB':>7s} {'err':>4s} {'spec hit':>9s}"
+    )
+    print(header)
+    for name in names:
+        result = run_scenario(name, SCENARIOS[name], args.concurrency, args.requests)
+        results[name] = result
+        print(
+            f"{name:16s} {result['rows']:>9d} {result['throughput_rps']:>8.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['peak_rss_mb']:>7.1f} {result['errors']:>4d} "
+            f"{result['speculation_hits']:>4d}/{result['speculation_started']:<4d}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return
+
+    if args.baseline.exists():
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions vs {args.baseline.name} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sqlite3
+
+import httpx
+import pytest
+
+from app.core import clients
+from app.core.settings import get_settings
+from app.services.intent_cache import get_intent_cache
+from app.services.query_engine import get_aggregate_support
+from app.services.result_cache import get_result_cache
+from app.services.rollup_store import get_rollup_store
+from bench.fake_postgrest import create_app, create_schema
+
+
+PROCESS_CACHES = (get_settings, get_result_cache, get_rollup_store, get_intent_cache, get_aggregate_support)
+
+
+@pytest.fixture(autouse=True)
+def test_settings(monkeypatch):
+    """
+    Settings pointing at the fake PostgREST, with process-wide caches reset.
+    """
+    monkeypatch.setenv("SUPABASE_URL", "http://postgrest.test")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "test")
+    monkeypatch.setenv("GROQ_API_KEY", "")
+    monkeypatch.setenv("ROLLUP_PATH", "")
+    monkeypatch.setenv("INTENT_CACHE_PATH", "")
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "0")
+    for cached in PROCESS_CACHES:
+        cached.cache_clear()
+    yield
+    for cached in PROCESS_CACHES:
+        cached.cache_clear()
+
+
+@pytest.fixture
+def db():
+    """
+    Empty in-memory `sales` and `expenses` tables.
+    """
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    create_schema(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def postgrest(db, monkeypatch):
+    """
+    Serve `db` through bench.fake_postgrest as the app's Supabase.
+
+    Call it (optionally with aggregates=False, like PostgREST without
+    db-aggregates-enabled) to install the client; it returns the list of
+    requests the app sends.
+    """
+
+    def serve(aggregates: bool = True) -> list[httpx.Request]:
+        sent: list[httpx.Request] = []
+
+        async def record(request: httpx.Request) -> None:
+            sent.append(request)
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=create_app(db, aggregates=aggregates)),
+            event_hooks={"request": [record]},
+        )
+        monkeypatch.setattr(clients, "_http_client", client)
+        return sent
+
+    return serve
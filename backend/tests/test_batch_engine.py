@@ -0,0 +1,100 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.batch_engine import intent_key, run_batch
+from app.services.query_engine import run_query
+
+
+TODAY = date.today().isoformat()
+YESTERDAY = (date.today() - timedelta(days=1)).isoformat()
+
+BY_PRODUCT = {"metric": "revenue", "time_range": "today", "comparison": "none", "breakdown": "product", "why_analysis": False}
+TOTAL = {**BY_PRODUCT, "breakdown": "none"}
+COUNT = {**TOTAL, "metric": "sales"}
+
+
+def seed(db) -> None:
+    db.executemany(
+        "INSERT INTO sales (date, revenue, product, category) VALUES (?, ?, ?, 'drinks')",
+        [(TODAY, 10.0, "tea"), (TODAY, 15.0, "tea"), (TODAY, 4.0, "coffee")],
+    )
+    db.commit()
+
+
+def test_breakdowns_use_grouped_selects_and_totals_share_one_fetch(db, postgrest):
+    seed(db)
+    sent = postgrest()
+
+    results = asyncio.run(run_batch([BY_PRODUCT, TOTAL, COUNT]))
+
+    assert results[intent_key(TOTAL)]["value"] == 29.0
+    assert results[intent_key(COUNT)]["value"] == 3
+    assert results[intent_key(BY_PRODUCT)]["breakdown"][0] == {"product": "tea", "value": 25.0, "rows": 2}
+    selects = sorted(r.url.params["select"] for r in sent)
+    # Grouped select for the breakdown, one combined aggregate for both totals
+    assert selects == ["count(),revenue_sum:revenue.sum()", "product,revenue.sum(),count()"]
+
+
+def test_batches_share_the_result_cache_with_single_queries(db, postgrest):
+    seed(db)
+    sent = postgrest()
+
+    async def scenario():
+        await run_query(BY_PRODUCT)
+        before = len(sent)
+        await asyncio.gather(
+            run_batch([BY_PRODUCT, TOTAL]),
+            run_batch([TOTAL]),
+        )
+        after_first = len(sent)
+        await run_batch([BY_PRODUCT, TOTAL])
+        return before, after_first, len(sent)
+
+    before, after_first, after_repeat = asyncio.run(scenario())
+
+    assert before == 1
+    # The breakdown was cached by /query's path; concurrent batches share the window fetch
+    assert after_first == 2
+    assert after_repeat == 2
+
+
+def test_batch_skips_aggregates_once_they_are_rejected(db, postgrest):
+    seed(db)
+    sent = postgrest(aggregates=False)
+
+    async def scenario():
+        await run_query({**TOTAL, "time_range": "last_7_days"})
+        return await run_batch([BY_PRODUCT, TOTAL, COUNT])
+
+    results = asyncio.run(scenario())
+
+    assert results[intent_key(TOTAL)]["value"] == 29.0
+    assert results[intent_key(COUNT)]["value"] == 3
+    selects = [r.url.params["select"] for r in sent]
+    assert selects[:2] == ["revenue.sum()", "revenue"]
+    # No further aggregate probes: projected fetches only
+    assert sorted(selects[2:]) == ["product,revenue", "revenue"]
+
+
+@pytest.mark.parametrize("drivers_enabled", ["true", "false"])
+def test_batch_why_takes_previous_value_from_the_attribution(db, postgrest, monkeypatch, drivers_enabled):
+    monkeypatch.setenv("DRIVERS_ENABLED", drivers_enabled)
+    seed(db)
+    db.execute("INSERT INTO sales (date, revenue, product, category) VALUES (?, 8.0, 'tea', 'drinks')", (YESTERDAY,))
+    db.commit()
+    sent = postgrest()
+    why = {**TOTAL, "comparison": "previous_period"}
+
+    result = asyncio.run(run_batch([why]))[intent_key(why)]
+
+    assert (result["value"], result["previous_value"]) == (29.0, 8.0)
+    window_totals = [r for r in sent if r.url.params["select"] == "count(),revenue_sum:revenue.sum()"]
+    if drivers_enabled == "true":
+        assert set(result["drivers"]) == {"product", "category"}
+        # Only the current window; the grouped attribution queries cover the previous one
+        assert len(window_totals) == 1
+    else:
+        assert result["drivers"] == {}
+        assert len(window_totals) == 2
@@ -0,0 +1,89 @@
+import pytest
+
+from app.services import breakdown_engine
+from app.services.breakdown_engine import OTHERS, compute_breakdown, group_sum, top_groups
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    """
+    Run a test against the NumPy group-by and the dict fallback.
+    """
+    if request.param == "numpy" and breakdown_engine.np is None:
+        pytest.skip("numpy not installed")
+    if request.param == "python":
+        monkeypatch.setattr(breakdown_engine, "np", None)
+    return request.param
+
+
+def test_group_sum_counts_and_totals(engine):
+    groups, counts, totals = group_sum(["tea", "coffee", "tea", "tea"], [10.0, 4.0, 2.5, None])
+
+    assert groups == ["tea", "coffee"]
+    assert counts == [3, 1]
+    # None amounts count as rows but add nothing
+    assert totals == [12.5, 4.0]
+
+
+def test_group_sum_without_values_counts_rows(engine):
+    assert group_sum(["a", "b", "a"]) == (["a", "b"], [2, 1], [2, 1])
+    assert group_sum([]) == ([], [], [])
+
+
+def test_top_groups_sorts_by_total_then_key():
+    groups, counts, totals = ["b", "c", "a"], [1, 2, 3], [5.0, 9.0, 5.0]
+
+    result = top_groups(groups, counts, totals, "product")
+
+    assert [r["product"] for r in result] == ["c", "a", "b"]
+    assert result[0] == {"product": "c", "value": 9.0, "rows": 2}
+
+
+def test_top_groups_folds_the_tail_into_others():
+    groups = ["p1", "p2", "p3", "p4", "p5"]
+
+    result = top_groups(groups, [1, 2, 3, 4, 5], [50.0, 40.0, 30.0, 20.004, 10.0], "product", top_n=2)
+
+    assert [r["product"] for r in result] == ["p1", "p2", OTHERS]
+    assert result[-1] == {"product": OTHERS, "value": 60.0, "rows": 12, "groups": 3}
+
+
+def test_top_groups_has_no_others_bucket_when_everything_fits():
+    result = top_groups(["a", "b"], [1, 1], [2.0, 1.0], "category", top_n=2)
+
+    assert all("groups" not in r for r in result)
+
+
+def test_a_real_others_key_stays_distinct_from_the_bucket():
+    result = top_groups([OTHERS, "a", "b"], [1, 1, 1], [9.0, 5.0, 1.0], "category", top_n=2)
+
+    assert result == [
+        {"category": OTHERS, "value": 9.0, "rows": 1},
+        {"category": "a", "value": 5.0, "rows": 1},
+        {"category": OTHERS, "value": 1.0, "rows": 1, "groups": 1},
+    ]
+
+
+def test_compute_breakdown_maps_missing_keys_to_unknown(engine):
+    rows = [
+        {"product": "tea", "revenue": 3.0},
+        {"product": None, "revenue": 2.0},
+        {"product": "", "revenue": None},
+        {"revenue": 1.0},
+    ]
+
+    result = compute_breakdown(rows, "product", "revenue")
+
+    assert result == [
+        {"product": "unknown", "value": 3.0, "rows": 3},
+        {"product": "tea", "value": 3.0, "rows": 1},
+    ]
+
+
+def test_compute_breakdown_counts_rows_without_a_value_column(engine):
+    rows = [{"category": "drinks"}, {"category": "snacks"}, {"category": "drinks"}]
+
+    assert compute_breakdown(rows, "category", None) == [
+        {"category": "drinks", "value": 2, "rows": 2},
+        {"category": "snacks", "value": 1, "rows": 1},
+    ]
@@ -0,0 +1,41 @@
+import asyncio
+import sqlite3
+
+from app.services.intent_cache import IntentCache
+
+
+INTENT = {"metric": "revenue", "time_range": "today", "comparison": "none", "breakdown": "none", "why_analysis": False}
+
+
+def stored_keys(path) -> set[str]:
+    with sqlite3.connect(path) as conn:
+        return {key for (key,) in conn.execute("SELECT key FROM intent_cache")}
+
+
+def test_writes_are_batched_off_the_loop_and_survive_restart(tmp_path):
+    path = tmp_path / "intents.sqlite"
+
+    async def scenario():
+        cache = IntentCache(max_size=2, ttl=60, path=str(path))
+        cache.put("revenue today", INTENT)
+        cache.put("sales today", {**INTENT, "metric": "sales"})
+        cache.put("expenses today", {**INTENT, "metric": "expenses"})  # evicts "revenue today"
+        # Nothing has been written on the loop yet; the writer runs on a thread
+        assert stored_keys(path) == set()
+        await cache.flush()
+
+    asyncio.run(scenario())
+
+    assert stored_keys(path) == {"sales today", "expenses today"}
+    restarted = IntentCache(max_size=2, ttl=60, path=str(path))
+    assert restarted.get("Sales today?")["metric"] == "sales"
+    assert restarted.get("revenue today") is None
+
+
+def test_lookups_only_touch_memory(tmp_path):
+    cache = IntentCache(max_size=4, ttl=60, path=str(tmp_path / "intents.sqlite"))
+    cache.put("revenue today", INTENT)
+    cache._db.close()  # any SQLite access from get() would now raise
+
+    assert cache.get("revenue today") == INTENT
+    assert cache.get("sales today") is None
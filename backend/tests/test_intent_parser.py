@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app.core.settings import Settings
+from app.services.intent_parser import parse_intent
+from bench.eval_intent_parser import CORPUS
+
+
+THRESHOLD = Settings(supabase_url="", supabase_anon_key="", groq_api_key="").fast_path_confidence
+CASES = [json.loads(line) for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["question"] for case in CASES])
+def test_corpus_routing(case):
+    result = parse_intent(case["question"])
+    fast = result.intent is not None and result.confidence >= THRESHOLD
+
+    if case["expected"] is None:
+        assert not fast, result
+    else:
+        assert fast, result
+        assert result.intent == case["expected"]
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # A measure, filter or line item the schema can't express
+        "average order value today",
+        "sales of tea today",
+        "how much did I spend on rent last month",
+        "cost of goods sold last month",
+    ],
+)
+def test_unexplained_words_keep_the_llm_in_the_loop(question):
+    result = parse_intent(question)
+
+    assert result.intent is not None
+    assert result.confidence < THRESHOLD
+
+
+def test_direction_words_do_not_block_the_fast_path():
+    result = parse_intent("Why did revenue drop last week?")
+
+    assert result.confidence >= THRESHOLD
+    assert result.intent["why_analysis"] is True
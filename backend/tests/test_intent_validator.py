@@ -0,0 +1,154 @@
+import asyncio
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import intent_validator
+from app.services.intent_cache import get_intent_cache
+from app.services.intent_validator import extract_validated_intent, hedge_delay, llm_stats
+
+
+QUESTION = "sales of tea today"
+LLM_INTENT = {"metric": "sales", "time_range": "today", "comparison": "none", "breakdown": "product", "why_analysis": False}
+# What the parser falls back to when no attempt validates
+PARSER_INTENT = {**LLM_INTENT, "breakdown": "none"}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """
+    Stub request_intent with a script of (delay seconds, intent or exception)
+    per attempt. Each call is recorded with whether it was cancelled.
+    """
+    fake = SimpleNamespace(script=[], calls=[])
+
+    async def request_intent(question):
+        delay, outcome = fake.script[len(fake.calls)]
+        call = {"cancelled": False}
+        fake.calls.append(call)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            call["cancelled"] = True
+            raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(intent_validator, "request_intent", request_intent)
+    monkeypatch.setattr(intent_validator, "_latencies", deque(maxlen=200))
+    monkeypatch.setenv("LLM_BUDGET", "1.0")
+    monkeypatch.setenv("LLM_ATTEMPT_TIMEOUT", "0.5")
+    monkeypatch.setenv("LLM_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("LLM_HEDGING", "false")
+    return fake
+
+
+def extract() -> tuple[dict, dict, float]:
+    """
+    (intent, llm_stats() delta, seconds taken) for QUESTION.
+    """
+    before = llm_stats()
+    started = time.perf_counter()
+    intent = asyncio.run(extract_validated_intent(QUESTION))
+    elapsed = time.perf_counter() - started
+    return intent, {key: value - before[key] for key, value in llm_stats().items() if value != before[key]}, elapsed
+
+
+def test_valid_answer_is_returned_and_cached(llm):
+    llm.script = [(0.0, LLM_INTENT)]
+
+    intent, counts, _ = extract()
+
+    assert intent == LLM_INTENT
+    assert counts == {"attempts": 1}
+    assert get_intent_cache().get(QUESTION) == LLM_INTENT
+
+
+def test_slow_attempt_times_out_and_is_retried(llm, monkeypatch):
+    monkeypatch.setenv("LLM_ATTEMPT_TIMEOUT", "0.05")
+    llm.script = [(1.0, LLM_INTENT), (0.0, LLM_INTENT)]
+
+    intent, counts, elapsed = extract()
+
+    assert intent == LLM_INTENT
+    assert counts == {"attempts": 2, "timeouts": 1, "retries": 1}
+    assert llm.calls[0]["cancelled"]
+    assert elapsed < 0.5
+
+
+@pytest.mark.parametrize("bad", [{"metric": "gold", "time_range": "today"}, ValueError("not JSON")])
+def test_invalid_output_counts_as_an_error_and_is_retried(llm, bad):
+    llm.script = [(0.0, bad), (0.0, LLM_INTENT)]
+
+    intent, counts, _ = extract()
+
+    assert intent == LLM_INTENT
+    assert counts == {"attempts": 2, "errors": 1, "retries": 1}
+
+
+def test_parser_answers_when_every_attempt_fails(llm):
+    llm.script = [(0.0, RuntimeError("503")), (0.0, {"metric": "gold"})]
+
+    intent, counts, _ = extract()
+
+    assert intent == PARSER_INTENT
+    assert counts == {"attempts": 2, "errors": 2, "retries": 1, "fallbacks": 1}
+    # Parser fallbacks are not cached, so the question reaches the LLM next time
+    assert get_intent_cache().get(QUESTION) is None
+
+
+def test_clarification_when_the_parser_has_nothing_either(llm):
+    llm.script = [(0.0, RuntimeError("503")), (0.0, RuntimeError("503"))]
+
+    intent = asyncio.run(extract_validated_intent("how is my business doing"))
+
+    assert intent == {"clarification_required": True}
+
+
+def test_budget_bounds_the_whole_extraction(llm, monkeypatch):
+    monkeypatch.setenv("LLM_BUDGET", "0.1")
+    monkeypatch.setenv("LLM_ATTEMPT_TIMEOUT", "5")
+    llm.script = [(5.0, LLM_INTENT), (5.0, LLM_INTENT)]
+
+    intent, counts, elapsed = extract()
+
+    assert intent == PARSER_INTENT
+    assert counts["fallbacks"] == 1
+    assert elapsed < 0.5
+    assert all(call["cancelled"] for call in llm.calls)
+
+
+def test_slow_attempt_is_hedged_and_the_loser_cancelled(llm, monkeypatch):
+    monkeypatch.setenv("LLM_HEDGING", "true")
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.05")
+    llm.script = [(0.4, LLM_INTENT), (0.0, {**LLM_INTENT, "why_analysis": True})]
+
+    intent, counts, elapsed = extract()
+
+    # The hedge answered first
+    assert intent["why_analysis"] is True
+    assert counts == {"attempts": 2, "hedges": 1}
+    assert llm.calls[0]["cancelled"]
+    assert elapsed < 0.3
+
+
+def test_no_hedge_without_llm_hedging(llm, monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.05")
+    llm.script = [(0.15, LLM_INTENT)]
+
+    intent, counts, _ = extract()
+
+    assert intent == LLM_INTENT
+    assert counts == {"attempts": 1}
+
+
+def test_hedge_delay_follows_observed_p95(llm, monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.8")
+    assert hedge_delay() == 0.8
+
+    intent_validator._latencies.extend(i / 100 for i in range(1, 101))
+
+    assert hedge_delay() == 0.96
@@ -0,0 +1,47 @@
+import io
+import json
+import logging
+
+import pytest
+
+from app.core.log import configure_logging, log_event
+
+
+@pytest.fixture
+def app_logger():
+    """
+    Restore the "app" logger after a test configures it.
+    """
+    logger = logging.getLogger("app")
+    saved = logger.handlers[:], logger.level, logger.propagate
+    yield
+    logger.handlers[:], logger.level, logger.propagate = saved
+
+
+def test_sampled_info_events_are_written_once_configured(app_logger, monkeypatch):
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "1")
+    stream = io.StringIO()
+    logger = logging.getLogger("app.services.query_engine")
+
+    configure_logging("INFO", stream)
+    log_event(logger, "run_query", table="sales")
+
+    line = stream.getvalue().strip()
+    assert " INFO app.services.query_engine " in line
+    assert json.loads(line.split(" ", 4)[-1]) == {"event": "run_query", "table": "sales"}
+
+
+def test_level_filters_and_reconfiguring_does_not_duplicate(app_logger, monkeypatch):
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "1")
+    stream = io.StringIO()
+    logger = logging.getLogger("app.api.query")
+
+    configure_logging("INFO", io.StringIO())
+    configure_logging("WARNING", stream)
+    log_event(logger, "intent")
+    log_event(logger, "table_page_failed", level=logging.WARNING)
+
+    assert [json.loads(line.split(" ", 4)[-1])["event"] for line in stream.getvalue().splitlines()] == [
+        "table_page_failed"
+    ]
+    assert len(logging.getLogger("app").handlers) == 1
@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+from app.core.metrics import REQUEST_SECONDS, render_metrics
+from app.main import app
+
+
+def test_request_latency_is_labelled_by_route_template():
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api.test") as client:
+            await client.get("/health")
+            for path in ("/wp-login.php", "/.env", "/api/nope/1", "/api/nope/2"):
+                assert (await client.get(path)).status_code == 404
+
+    asyncio.run(scenario())
+
+    paths = {dict(key)["path"] for key in REQUEST_SECONDS._series}
+    assert "/health" in paths
+    assert "unmatched" in paths
+    assert not paths & {"/wp-login.php", "/.env", "/api/nope/1", "/api/nope/2"}
+
+
+def test_cache_sizes_are_exposed_as_gauges():
+    text = render_metrics()
+
+    assert "# TYPE vyapar_result_cache_size gauge" in text
+    assert "# TYPE vyapar_intent_cache_size gauge" in text
+    assert 'kind="size"' not in text
+    assert 'vyapar_result_cache{kind="hits"}' in text
@@ -0,0 +1,203 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.query_engine import (
+    get_aggregate_support,
+    previous_window,
+    resolve_window,
+    run_comparison,
+    run_query,
+)
+
+
+TODAY = date.today()
+YESTERDAY = TODAY - timedelta(days=1)
+
+
+def add_sales(db, rows: list[tuple[date, float]]) -> None:
+    db.executemany(
+        "INSERT INTO sales (date, revenue, product, category) VALUES (?, ?, 'tea', 'drinks')",
+        [(day.isoformat(), revenue) for day, revenue in rows],
+    )
+    db.commit()
+
+
+def add_expenses(db, rows: list[tuple[date, float]]) -> None:
+    db.executemany(
+        "INSERT INTO expenses (date, amount, category) VALUES (?, ?, 'rent')",
+        [(day.isoformat(), amount) for day, amount in rows],
+    )
+    db.commit()
+
+
+def test_count_reads_content_range_without_rows(db, postgrest):
+    add_sales(db, [(TODAY, 10.0), (TODAY, 20.0), (TODAY, 5.5), (YESTERDAY, 99.0)])
+    sent = postgrest()
+
+    result = asyncio.run(run_query({"metric": "sales", "time_range": "today"}))
+
+    assert result == {"value": 3, "rows": []}
+    assert [r.method for r in sent] == ["HEAD"]
+    assert sent[0].headers["prefer"] == "count=exact"
+
+
+def test_sum_is_pushed_down_to_postgrest(db, postgrest):
+    add_sales(db, [(TODAY, 10.0), (TODAY, 20.0), (TODAY, 5.5), (YESTERDAY, 99.0)])
+    sent = postgrest()
+
+    result = asyncio.run(run_query({"metric": "revenue", "time_range": "today"}))
+
+    assert result == {"value": 35.5, "rows": []}
+    assert len(sent) == 1
+    assert sent[0].url.params["select"] == "revenue.sum()"
+
+
+def test_sum_of_empty_window_is_zero(db, postgrest):
+    add_expenses(db, [(YESTERDAY, 400.0)])
+    postgrest()
+
+    result = asyncio.run(run_query({"metric": "expenses", "time_range": "today"}))
+
+    assert result == {"value": 0, "rows": []}
+
+
+def test_rejected_aggregate_falls_back_to_projected_column(db, postgrest):
+    add_expenses(db, [(TODAY, 400.0), (TODAY, 150.25), (YESTERDAY, 1000.0)])
+    sent = postgrest(aggregates=False)
+
+    result = asyncio.run(run_query({"metric": "expenses", "time_range": "today"}))
+
+    assert result == {"value": 550.25, "rows": []}
+    assert [r.url.params["select"] for r in sent] == ["amount.sum()", "amount"]
+
+
+def test_rejected_aggregates_are_not_retried_until_the_interval(db, postgrest, monkeypatch):
+    add_sales(db, [(TODAY, 10.0), (YESTERDAY, 5.0)])
+    sent = postgrest(aggregates=False)
+
+    asyncio.run(run_query({"metric": "revenue", "time_range": "today"}))
+    asyncio.run(run_query({"metric": "revenue", "time_range": "last_7_days", "breakdown": "product"}))
+
+    # Only the first query probes; the breakdown goes straight to projected rows
+    assert [r.url.params["select"] for r in sent] == ["revenue.sum()", "revenue", "product,revenue"]
+
+    monkeypatch.setattr(get_aggregate_support(), "retry_after", 0.0)
+    get_aggregate_support().mark_unavailable("sales")
+    asyncio.run(run_query({"metric": "revenue", "time_range": "last_month"}))
+
+    assert [r.url.params["select"] for r in sent[3:]] == ["revenue.sum()", "revenue"]
+
+
+def test_count_does_not_need_aggregate_support(db, postgrest):
+    add_expenses(db, [(TODAY, 400.0), (TODAY, 150.25)])
+    add_sales(db, [(TODAY, 1.0), (TODAY, 2.0)])
+    postgrest(aggregates=False)
+
+    result = asyncio.run(run_query({"metric": "sales", "time_range": "today"}))
+
+    assert result["value"] == 2
+
+
+@pytest.mark.parametrize(
+    "time_range, today, current, previous",
+    [
+        # today: the day itself against the day before, across the year boundary
+        ("today", date(2026, 1, 1), (date(2026, 1, 1), date(2026, 1, 2)), (date(2025, 12, 31), date(2026, 1, 1))),
+        ("today", date(2026, 3, 1), (date(2026, 3, 1), date(2026, 3, 2)), (date(2026, 2, 28), date(2026, 3, 1))),
+        # last_7_days: seven days back through today (8 days), then the 8 days before
+        (
+            "last_7_days",
+            date(2026, 1, 3),
+            (date(2025, 12, 27), date(2026, 1, 4)),
+            (date(2025, 12, 19), date(2025, 12, 27)),
+        ),
+        (
+            "last_7_days",
+            date(2026, 2, 28),
+            (date(2026, 2, 21), date(2026, 3, 1)),
+            (date(2026, 2, 13), date(2026, 2, 21)),
+        ),
+        # last_month: the previous calendar month, then the one before
+        (
+            "last_month",
+            date(2026, 1, 15),
+            (date(2025, 12, 1), date(2026, 1, 1)),
+            (date(2025, 11, 1), date(2025, 12, 1)),
+        ),
+        (
+            "last_month",
+            date(2026, 2, 1),
+            (date(2026, 1, 1), date(2026, 2, 1)),
+            (date(2025, 12, 1), date(2026, 1, 1)),
+        ),
+        (
+            "last_month",
+            date(2026, 3, 31),
+            (date(2026, 2, 1), date(2026, 3, 1)),
+            (date(2026, 1, 1), date(2026, 2, 1)),
+        ),
+        (
+            "last_month",
+            date(2024, 3, 31),
+            (date(2024, 2, 1), date(2024, 3, 1)),
+            (date(2024, 1, 1), date(2024, 2, 1)),
+        ),
+        (
+            "last_month",
+            date(2026, 12, 31),
+            (date(2026, 11, 1), date(2026, 12, 1)),
+            (date(2026, 10, 1), date(2026, 11, 1)),
+        ),
+        # Unknown ranges behave like today
+        (None, date(2026, 1, 1), (date(2026, 1, 1), date(2026, 1, 2)), (date(2025, 12, 31), date(2026, 1, 1))),
+    ],
+)
+def test_windows(time_range, today, current, previous):
+    assert resolve_window(time_range, today) == current
+    assert previous_window(time_range, today) == previous
+
+
+@pytest.mark.parametrize("time_range", ["today", "last_7_days", "last_month"])
+def test_comparison_matches_seeded_windows(db, postgrest, time_range):
+    start, end = resolve_window(time_range)
+    previous_start, previous_end = previous_window(time_range)
+    last_day = end - timedelta(days=1)
+    # Rows on each window's first and last day, plus rows just outside both
+    add_sales(db, [
+        (start, 100.0),
+        (last_day, 20.0),
+        (previous_start, 7.0),
+        (previous_end - timedelta(days=1), 3.0),
+        (previous_start - timedelta(days=1), 1000.0),
+        (end, 5000.0),
+    ])
+    postgrest()
+
+    revenue = asyncio.run(run_comparison({"metric": "revenue", "time_range": time_range}))
+    sales = asyncio.run(run_comparison({"metric": "sales", "time_range": time_range}))
+
+    assert revenue["value"] == 120.0
+    assert revenue["previous_value"] == 10.0
+    assert (sales["value"], sales["previous_value"]) == (2, 2)
+
+
+@pytest.mark.parametrize("drivers_enabled", ["true", "false"])
+def test_comparison_previous_value_with_and_without_drivers(db, postgrest, monkeypatch, drivers_enabled):
+    monkeypatch.setenv("DRIVERS_ENABLED", drivers_enabled)
+    start, _ = previous_window("today")
+    add_sales(db, [(TODAY, 40.0), (start, 15.0), (start, 5.0)])
+    sent = postgrest()
+
+    result = asyncio.run(run_comparison({"metric": "revenue", "time_range": "today"}))
+
+    assert (result["value"], result["previous_value"]) == (40.0, 20.0)
+    totals = [r for r in sent if r.url.params["select"] == "revenue.sum()"]
+    if drivers_enabled == "true":
+        # Previous total comes from the attribution's grouped totals
+        assert set(result["drivers"]) == {"product", "category"}
+        assert len(totals) == 1
+    else:
+        assert result["drivers"] == {}
+        assert len(totals) == 2
@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import result_cache
+from app.services.result_cache import ResultCache, result_ttl
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Manual clock for TTL expiry; asyncio keeps the real one.
+    """
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def counting_loader(result: dict | None = None, delay: float = 0.0):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        number = len(calls)
+        await asyncio.sleep(delay)
+        return result if result is not None else {"value": number, "rows": []}
+
+    return load, calls
+
+
+def test_concurrent_callers_share_one_load():
+    cache = ResultCache()
+    load, calls = counting_loader(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load(("sales", "k"), 30, load) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.stats() == {"hits": 0, "misses": 1, "coalesced": 4, "size": 1}
+
+
+def test_results_expire_after_their_ttl(clock):
+    cache = ResultCache()
+    load, calls = counting_loader()
+
+    async def get(ttl):
+        return await cache.get_or_load(("sales", "k"), ttl, load)
+
+    assert asyncio.run(get(30))["value"] == 1
+    clock.value += 29.9
+    assert asyncio.run(get(30))["value"] == 1
+    clock.value += 0.2
+    assert asyncio.run(get(30))["value"] == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_ttl_depends_on_the_time_range(monkeypatch):
+    monkeypatch.setenv("RESULT_TTL_TODAY", "5")
+    monkeypatch.setenv("RESULT_TTL_LAST_7_DAYS", "60")
+    monkeypatch.setenv("RESULT_TTL_LAST_MONTH", "600")
+
+    assert [result_ttl(r) for r in ("today", "last_7_days", "last_month", None, "yesterday")] == [5, 60, 600, 5, 5]
+
+
+def test_zero_ttl_size_and_large_results_are_not_kept():
+    load, calls = counting_loader(result={"value": 1, "rows": [{}] * 3})
+
+    async def twice(cache, ttl):
+        await cache.get_or_load(("sales", "k"), ttl, load)
+        await cache.get_or_load(("sales", "k"), ttl, load)
+
+    asyncio.run(twice(ResultCache(), 0))
+    asyncio.run(twice(ResultCache(max_size=0), 30))
+    asyncio.run(twice(ResultCache(max_rows=2), 30))
+
+    assert len(calls) == 6
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(max_size=2)
+    load, calls = counting_loader()
+
+    async def scenario():
+        for key in ("a", "b", "a", "c", "a", "b"):
+            await cache.get_or_load(("sales", key), 30, load)
+
+    asyncio.run(scenario())
+
+    # "b" was least recently used when "c" arrived
+    assert len(calls) == 4
+    assert cache.stats()["size"] == 2
+
+
+def test_failed_loads_are_not_cached():
+    cache = ResultCache()
+    attempts = []
+
+    async def load():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream 503")
+        return {"value": 1, "rows": []}
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load(("sales", "k"), 30, load)
+        return await cache.get_or_load(("sales", "k"), 30, load)
+
+    assert asyncio.run(scenario()) == {"value": 1, "rows": []}
+    assert len(attempts) == 2
+
+
+def test_invalidate_drops_one_table_or_everything():
+    cache = ResultCache()
+    load, calls = counting_loader()
+
+    async def scenario():
+        for key in (("sales", 1), ("expenses", 1)):
+            await cache.get_or_load(key, 30, load)
+        cache.invalidate("sales")
+        sizes = [cache.stats()["size"]]
+        await cache.get_or_load(("expenses", 1), 30, load)
+        await cache.get_or_load(("sales", 1), 30, load)
+        cache.invalidate()
+        sizes.append(cache.stats()["size"])
+        return sizes
+
+    assert asyncio.run(scenario()) == [1, 0]
+    assert len(calls) == 3
+
+
+def test_a_load_invalidated_in_flight_is_returned_but_not_cached():
+    cache = ResultCache()
+    load, calls = counting_loader(delay=0.05)
+
+    async def scenario():
+        first = asyncio.create_task(cache.get_or_load(("sales", "k"), 30, load))
+        await asyncio.sleep(0.01)
+        cache.invalidate("sales")
+        # A caller after invalidation starts a fresh load instead of joining
+        second = await cache.get_or_load(("sales", "k"), 30, load)
+        stale = await first
+        third = await cache.get_or_load(("sales", "k"), 30, load)
+        return stale, second, third
+
+    stale, second, third = asyncio.run(scenario())
+
+    assert (stale["value"], second["value"]) == (1, 2)
+    # The stale result did not overwrite the fresh one
+    assert third is second
+    assert len(calls) == 2
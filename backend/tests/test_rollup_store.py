@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from datetime import timedelta
+
+from app.services import rollup_store
+from app.services.query_engine import resolve_window, run_query
+from app.services.result_cache import get_result_cache
+from app.services.rollup_store import get_rollup_store, sync_source
+
+
+INTENT = {"metric": "revenue", "time_range": "last_month"}
+
+
+def test_partial_sync_is_not_served_as_fresh(db, postgrest, monkeypatch, tmp_path):
+    monkeypatch.setenv("ROLLUP_PATH", str(tmp_path / "rollups.sqlite"))
+    monkeypatch.setenv("ROLLUP_PAGE_SIZE", "10")
+    start, end = resolve_window("last_month")
+    days = (end - start).days
+    rows = [((start + timedelta(days=i % days)).isoformat(), float(i + 1)) for i in range(45)]
+    db.executemany("INSERT INTO sales (date, revenue, product, category) VALUES (?, ?, 'tea', 'drinks')", rows)
+    db.commit()
+    expected = sum(revenue for _, revenue in rows)
+    sent = postgrest()
+
+    store = get_rollup_store()
+    fetch_page = rollup_store.supabase_request
+    seen_mid_sync = []
+
+    async def fetch_page_then_query(table, params, *args, **kwargs):
+        if len(seen_mid_sync) == 0 and store.watermark("sales")[0] > 0:
+            # One page is folded in; the rollups hold only part of the month
+            seen_mid_sync.append((store.is_fresh("sales", 300), await run_query(INTENT)))
+        return await fetch_page(table, params, *args, **kwargs)
+
+    monkeypatch.setattr(rollup_store, "supabase_request", fetch_page_then_query)
+
+    async def scenario():
+        applied = await sync_source(store, "sales")
+        get_result_cache().invalidate()
+        calls_before = len(sent)
+        after = await run_query(INTENT)
+        return applied, after, len(sent) - calls_before
+
+    applied, after, calls_after = asyncio.run(scenario())
+
+    assert applied == 45
+    fresh_mid_sync, mid_sync = seen_mid_sync[0]
+    assert not fresh_mid_sync
+    assert mid_sync["value"] == expected
+    # Once caught up the rollups answer on their own
+    assert store.is_fresh("sales", 300)
+    assert after["value"] == expected
+    assert calls_after == 0
+
+
+def test_reads_do_not_wait_for_a_page_write(tmp_path):
+    store = rollup_store.RollupStore(str(tmp_path / "rollups.sqlite"))
+    start, end = resolve_window("last_month")
+    store.apply("sales", [{"id": 1, "date": start.isoformat(), "revenue": 50.0, "product": "tea", "category": "drinks"}], 1)
+    store.mark_synced("sales")
+
+    results = []
+
+    def read():
+        results.append((store.is_fresh("sales", 300), store.totals("sales", start, end)))
+
+    # Simulate apply() mid-page: writer lock held and a write transaction open
+    with store._write_lock:
+        store._db.execute("BEGIN IMMEDIATE")
+        store._db.execute("UPDATE rollups SET total = total + 1000")
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=2)
+        store._db.rollback()
+
+    assert not reader.is_alive()
+    assert results == [(True, (1, 50.0))]
+
+
+def test_rollup_reads_leave_the_event_loop_free(monkeypatch):
+    monkeypatch.setenv("ROLLUP_PATH", ":memory:")
+    store = get_rollup_store()
+    start, _ = resolve_window("last_month")
+    store.apply("sales", [{"id": 1, "date": start.isoformat(), "revenue": 50.0, "product": "tea", "category": "drinks"}], 1)
+    store.mark_synced("sales")
+
+    async def scenario():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0)
+        # ":memory:" reads share the writer's lock; hold it as a page write would
+        store._write_lock.acquire()
+        threading.Timer(0.2, store._write_lock.release).start()
+        result = await run_query(INTENT)
+        ticker.cancel()
+        return ticks, result
+
+    ticks, result = asyncio.run(scenario())
+
+    # The loop kept running while the read waited for the lock
+    assert ticks >= 5
+    assert result["value"] == 50.0
@@ -0,0 +1,156 @@
+import asyncio
+import gc
+
+import pytest
+
+from app.services import speculation
+from app.services.query_engine import fetch_plan
+from app.services.speculation import resolve_with_prefetch, speculation_stats
+
+
+GUESS = {"metric": "revenue", "time_range": "today", "comparison": "none", "breakdown": "none", "why_analysis": False}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """
+    Skip the local paths, guess GUESS, and let each test script the LLM:
+    set llm.intent (or llm.error) and llm.delay.
+    """
+
+    class FakeLLM:
+        intent = GUESS
+        error: BaseException | None = None
+        delay = 0.05
+
+    async def extract_validated_intent(question):
+        await asyncio.sleep(FakeLLM.delay)
+        if FakeLLM.error is not None:
+            raise FakeLLM.error
+        return FakeLLM.intent
+
+    monkeypatch.setattr(speculation, "resolve_local_intent", lambda question: None)
+    monkeypatch.setattr(speculation, "fallback_intent", lambda question: GUESS)
+    monkeypatch.setattr(speculation, "extract_validated_intent", extract_validated_intent)
+    return FakeLLM
+
+
+def run(scenario):
+    """
+    asyncio.run() that collects loop exception-handler reports (e.g. "Task
+    exception was never retrieved") raised while the loop is running.
+    """
+    reports = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: reports.append(context["message"]))
+        result = await scenario()
+        gc.collect()
+        await asyncio.sleep(0)
+        return result
+
+    return asyncio.run(main()), reports
+
+
+def stats_delta(before: dict) -> dict:
+    return {key: value - before[key] for key, value in speculation_stats().items()}
+
+
+def test_hit_returns_the_running_fetch(llm):
+    fetched = []
+
+    async def fetch(intent):
+        fetched.append(intent)
+        await asyncio.sleep(0.2)
+        return {"value": 7}
+
+    async def scenario():
+        intent, task = await resolve_with_prefetch("revenue today", plan=fetch_plan, fetch=fetch)
+        running = task is not None and not task.done()
+        return intent, running, await task
+
+    before = speculation_stats()
+    (intent, running, result), reports = run(scenario)
+
+    assert intent == GUESS
+    # Started alongside the LLM call and still in flight when handed over
+    assert running
+    assert result == {"value": 7}
+    assert fetched == [GUESS]
+    assert stats_delta(before) == {"started": 1, "hits": 1, "misses": 0}
+    assert reports == []
+
+
+@pytest.mark.parametrize(
+    "intent",
+    [
+        {**GUESS, "time_range": "last_month"},
+        {"clarification_required": True},
+    ],
+)
+def test_miss_cancels_the_fetch(llm, intent):
+    llm.intent = intent
+    tasks = []
+
+    async def fetch(guess):
+        tasks.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def scenario():
+        result = await resolve_with_prefetch("q", plan=fetch_plan, fetch=fetch)
+        await asyncio.sleep(0)
+        return result
+
+    before = speculation_stats()
+    (resolved, task), reports = run(scenario)
+
+    assert resolved == intent
+    assert task is None
+    assert tasks[0].cancelled()
+    assert stats_delta(before) == {"started": 1, "hits": 0, "misses": 1}
+    assert reports == []
+
+
+def test_miss_after_a_failed_fetch_leaves_no_unretrieved_exception(llm):
+    llm.intent = {**GUESS, "metric": "expenses"}
+
+    async def fetch(guess):
+        raise RuntimeError("supabase down")
+
+    (resolved, task), reports = run(lambda: resolve_with_prefetch("q", plan=fetch_plan, fetch=fetch))
+
+    assert resolved == llm.intent
+    assert task is None
+    assert reports == []
+
+
+def test_llm_error_discards_the_fetch(llm):
+    llm.error = RuntimeError("groq down")
+    tasks = []
+
+    async def fetch(guess):
+        tasks.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def scenario():
+        with pytest.raises(RuntimeError, match="groq down"):
+            await resolve_with_prefetch("q", plan=fetch_plan, fetch=fetch)
+        await asyncio.sleep(0)
+
+    _, reports = run(scenario)
+
+    assert tasks[0].cancelled()
+    assert reports == []
+
+
+def test_no_fetch_when_speculation_is_disabled(llm, monkeypatch):
+    monkeypatch.setenv("SPECULATION_ENABLED", "false")
+
+    async def fetch(guess):
+        raise AssertionError("should not fetch")
+
+    before = speculation_stats()
+    (resolved, task), reports = run(lambda: resolve_with_prefetch("q", plan=fetch_plan, fetch=fetch))
+
+    assert (resolved, task) == (GUESS, None)
+    assert stats_delta(before) == {"started": 0, "hits": 0, "misses": 0}
@@ -0,0 +1,118 @@
+import asyncio
+import base64
+import json
+from datetime import date
+
+import httpx
+import pytest
+
+from app.main import app
+from app.services.table_pages import InvalidCursor, decode_cursor, encode_cursor, fetch_table_page
+
+
+INTENT = {"metric": "revenue", "time_range": "today"}
+TODAY = date.today().isoformat()
+
+
+def forge(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor({"date": "2026-01-31", "id": 42})) == ("2026-01-31", 42)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        ["2000-01-01,id.gt.0)", 1],
+        ["2026-01-31", "1)"],
+        ["not a date", 1],
+        ["2026-01-31", True],
+        [None, 1],
+        {"date": "2026-01-31"},
+    ],
+)
+def test_forged_cursors_are_rejected(payload):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(forge(payload))
+
+
+def test_pages_cover_the_window_once(db, postgrest):
+    db.executemany(
+        "INSERT INTO sales (date, revenue, product, category) VALUES (?, ?, 'tea', 'drinks')",
+        [(TODAY, float(i)) for i in range(7)],
+    )
+    db.commit()
+    postgrest()
+
+    async def all_pages():
+        ids, cursor = [], None
+        while True:
+            page = await fetch_table_page(INTENT, ["revenue"], page_size=3, cursor=cursor)
+            ids += [row["id"] for row in page["rows"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    assert asyncio.run(all_pages()) == list(range(1, 8))
+
+
+def test_unknown_columns_are_a_client_error(db, postgrest):
+    sent = postgrest()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api.test") as client:
+            payload = {"question": "revenue today", "columns": ["nope"]}
+            return [
+                await client.post("/api/query", json=payload),
+                await client.post("/api/query/export", json=payload),
+            ]
+
+    responses = asyncio.run(scenario())
+
+    assert [r.status_code for r in responses] == [400, 400]
+    assert "nope" in responses[0].json()["detail"]
+    assert not any("nope" in r.url.params.get("select", "") for r in sent)
+
+
+def post_batch(payload: dict) -> httpx.Response:
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api.test") as client:
+            return await client.post("/api/query/batch", json=payload)
+
+    return asyncio.run(scenario())
+
+
+def test_batch_tiles_on_the_same_window_share_a_page(db, postgrest):
+    db.execute("INSERT INTO sales (date, revenue, product, category) VALUES (?, 5.0, 'tea', 'drinks')", (TODAY,))
+    db.commit()
+    sent = postgrest()
+    questions = ["revenue today", "sales today", "revenue last month", "sales last month", "expenses today"]
+
+    response = post_batch({"questions": questions})
+
+    assert response.status_code == 200
+    pages = [(r.url.path, tuple(r.url.params.get_list("date"))) for r in sent if "order" in r.url.params]
+    # sales today, sales last month and expenses today
+    assert len(pages) == len(set(pages)) == 3
+    tables = {result["question"]: result["table"] for result in response.json()["results"]}
+    assert tables["revenue today"] == tables["sales today"] != []
+
+
+def test_batch_reports_invalid_columns_per_tile(db, postgrest):
+    db.execute("INSERT INTO sales (date, revenue, product, category) VALUES (?, 5.0, 'tea', 'drinks')", (TODAY,))
+    db.commit()
+    sent = postgrest()
+
+    response = post_batch({"questions": ["revenue today", "expenses today"], "columns": ["product"]})
+
+    assert response.status_code == 200
+    revenue, expenses = response.json()["results"]
+    assert [set(row) for row in revenue["table"]] == [{"date", "id", "product"}]
+    assert "table_error" not in revenue
+    assert expenses["table"] == []
+    assert "product" in expenses["table_error"]
+    assert not any(r.url.path.endswith("/expenses") and "order" in r.url.params for r in sent)
@@ -0,0 +1,100 @@
+import pytest
+
+from app.services.why_engine import attribute_change, driver_reasons
+
+
+# Total goes 100 -> 130 (growth 1.3): "a" grows, "b" shrinks, "c" is new, "d" is lost
+GROUPS = ["a", "b", "c", "d"]
+CURRENT = [90.0, 30.0, 10.0, 0.0]
+PREVIOUS = [40.0, 40.0, 0.0, 20.0]
+
+
+def by_key(attribution: dict) -> dict:
+    return {item["product"]: item for item in attribution["top_contributors"]}
+
+
+def test_effects_split_each_change_and_add_up():
+    attribution = attribute_change(GROUPS, CURRENT, PREVIOUS, "product", top_n=10)
+    items = by_key(attribution)
+
+    assert attribution["total_change"] == 30.0
+    assert items["a"] == {
+        "product": "a",
+        "current": 90.0,
+        "previous": 40.0,
+        "change": 50.0,
+        "share_of_change": 166.67,
+        "volume_effect": 12.0,
+        "mix_effect": 38.0,
+        "status": "existing",
+    }
+    assert (items["b"]["volume_effect"], items["b"]["mix_effect"]) == (12.0, -22.0)
+    # Volume effects add up to the total change; mix effects cancel out
+    assert sum(item["volume_effect"] for item in items.values()) == pytest.approx(30.0)
+    assert sum(item["mix_effect"] for item in items.values()) == pytest.approx(0.0)
+    assert sum(item["change"] for item in items.values()) == pytest.approx(attribution["total_change"])
+
+
+def test_new_and_lost_keys_are_classified():
+    attribution = attribute_change(GROUPS, CURRENT, PREVIOUS, "product", top_n=1)
+    items = by_key(attribute_change(GROUPS, CURRENT, PREVIOUS, "product", top_n=10))
+
+    # Listed even when they are not among the top contributors
+    assert attribution["new"] == ["c"]
+    assert attribution["lost"] == ["d"]
+    assert [items[key]["status"] for key in GROUPS] == ["existing", "existing", "new", "lost"]
+
+
+def test_top_contributors_by_absolute_change_then_key():
+    attribution = attribute_change(GROUPS, CURRENT, PREVIOUS, "product", top_n=3)
+
+    # |50|, |-20|, then the |10| tie between "b" and "c" broken by key
+    assert [item["product"] for item in attribution["top_contributors"]] == ["a", "d", "b"]
+
+
+def test_zero_previous_total_attributes_everything_to_volume():
+    attribution = attribute_change(["tea", "coffee"], [30.0, 10.0], [0.0, 0.0], "product")
+    items = by_key(attribution)
+
+    assert attribution["total_change"] == 40.0
+    assert items["tea"]["volume_effect"] == 30.0
+    assert items["tea"]["mix_effect"] == 0.0
+    assert items["tea"]["share_of_change"] == 75.0
+    assert attribution["new"] == ["tea", "coffee"]
+
+
+def test_no_change_has_zero_shares():
+    attribution = attribute_change(["", None], [5.0, 5.0], [5.0, 5.0], "category")
+
+    assert attribution["total_change"] == 0
+    assert [item["category"] for item in attribution["top_contributors"]] == ["unknown", "unknown"]
+    assert all(item["share_of_change"] == 0 for item in attribution["top_contributors"])
+
+
+def test_driver_reasons_rank_across_dimensions():
+    drivers = {
+        "product": attribute_change(GROUPS, CURRENT, PREVIOUS, "product"),
+        "category": attribute_change(["drinks", "snacks"], [100.0, 30.0], [70.0, 30.0], "category"),
+    }
+
+    reasons = driver_reasons(drivers, "revenue", limit=3)
+
+    assert [(r["dimension"], r["key"], r["change"], r["direction"]) for r in reasons] == [
+        ("product", "a", 50.0, "up"),
+        ("category", "drinks", 30.0, "up"),
+        ("product", "d", -20.0, "down"),
+    ]
+    assert reasons[0]["reason"] == "Product 'a' added 50.0 (166.67% of the change in revenue); mostly a shift in mix."
+    assert reasons[2]["reason"] == (
+        "Product 'd' took away 20.0 (66.67% of the change in revenue); it had nothing this period."
+    )
+
+
+def test_driver_reasons_skip_unchanged_keys_and_mark_new_ones():
+    drivers = {"product": attribute_change(["tea", "coffee"], [10.0, 5.0], [0.0, 5.0], "product")}
+
+    reasons = driver_reasons(drivers, "sales")
+
+    assert [r["key"] for r in reasons] == ["tea"]
+    assert reasons[0]["reason"].endswith("; it is new this period.")
+    assert driver_reasons({}, "sales") == []
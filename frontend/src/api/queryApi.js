@@ -1,9 +1,10 @@
-export async function askQuestion(question) {
+export async function askQuestion(question, cursor = null) {
   try {
     const response = await fetch('http://localhost:8000/api/query', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ question }),
+      // The table comes back one page at a time; pass next_cursor for the next one
+      body: JSON.stringify(cursor ? { question, cursor } : { question }),
     });
 
     if (!response.ok) {
@@ -9,12 +9,15 @@ function ChatPage() {
   const [loading, setLoading] = useState(false);
   const [data, setData] = useState(null);
   const [error, setError] = useState(null);
+  const [question, setQuestion] = useState('');
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  const handleSubmit = async (question) => {
+  const handleSubmit = async (text) => {
     setError(null);
     setLoading(true);
+    setQuestion(text);
     try {
-      const response = await askQuestion(question);
+      const response = await askQuestion(text);
       setData(response);
     } catch (err) {
       setError(err?.message || 'Something went wrong');
@@ -24,6 +27,24 @@ function ChatPage() {
     }
   };
 
+  const handleLoadMore = async () => {
+    if (!data?.next_cursor) return;
+    setError(null);
+    setLoadingMore(true);
+    try {
+      const response = await askQuestion(question, data.next_cursor);
+      setData((current) => ({
+        ...current,
+        table: [...(current?.table || []), ...(response.table || [])],
+        next_cursor: response.next_cursor,
+      }));
+    } catch (err) {
+      setError(err?.message || 'Something went wrong');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const hasWhy = Array.isArray(data?.why) && data.why.length > 0;
   const hasTable = Array.isArray(data?.table) && data.table.length > 0;
 
@@ -46,6 +67,13 @@ function ChatPage() {
             {data.answer && <MessageBubble text={data.answer} />}
             {hasWhy && <WhyPanel why={data.why} />}
             {hasTable && <TableView rows={data.table} />}
+            {hasTable && data.next_cursor && (
+              <div className="actions">
+                <button className="btn" onClick={handleLoadMore} disabled={loadingMore}>
+                  {loadingMore ? 'Loading...' : 'Load more rows'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </section>